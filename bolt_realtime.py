@@ -9,9 +9,17 @@ Production Enhancements:
 - Sentry error tracking and monitoring
 - Health monitoring dashboard
 """
-import os, json, base64, asyncio, websockets, ssl, re, time, requests, audioop
+import os, sys, json, base64, asyncio, websockets, ssl, re, time, requests, audioop, traceback, threading, smtplib
+import atexit, hmac, logging, logging.handlers, queue, uuid
+import importlib.util
+import urllib.parse
 import certifi
-from datetime import datetime, timedelta
+import orjson
+import pytz
+from dateutil import parser
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from datetime import datetime, timedelta, timezone
 from fastapi import FastAPI, WebSocket, Request
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.websockets import WebSocketDisconnect
@@ -21,7 +29,10 @@ from dotenv import load_dotenv
 from supabase import create_client
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from collections import defaultdict
+from collections import defaultdict, deque
+from cachetools import TTLCache
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
 
 # Sentry for error tracking (production monitoring)
 try:
@@ -42,16 +53,22 @@ except ImportError:
     ELEVENLABS_AVAILABLE = False
     print("[WARN] ElevenLabs not installed. Run: pip install elevenlabs")
 
+# C RFC 3339 parser for calendar event times (optional - falls back to datetime.fromisoformat)
+try:
+    from ciso8601 import parse_rfc3339
+except ImportError:
+    parse_rfc3339 = None
+
 # Audio processing (base64 encoding)
 from io import BytesIO
 
-# Google Calendar imports
+# Google Calendar - googleapiclient is slow to import, so only check it's installed here;
+# _get_calendar_service() imports it on first use
 try:
-    from google.oauth2 import service_account
-    from googleapiclient.discovery import build
-    GOOGLE_CALENDAR_AVAILABLE = True
-except ImportError:
+    GOOGLE_CALENDAR_AVAILABLE = all(importlib.util.find_spec(name) for name in ("googleapiclient", "google.oauth2"))
+except ImportError:  # find_spec imports the parent package - "google" itself may be missing
     GOOGLE_CALENDAR_AVAILABLE = False
+if not GOOGLE_CALENDAR_AVAILABLE:
     print("[WARN] Google Calendar libraries not installed. Calendar booking disabled.")
 
 load_dotenv()
@@ -59,6 +76,9 @@ load_dotenv()
 # ======================== Config ========================
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PORT = int(os.getenv("PORT", 5000))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # DEBUG to include "[DEBUG]" log lines
+LOG_TRACEBACKS = os.getenv("LOG_TRACEBACKS", "true").lower() == "true"  # Full tracebacks when a call's media stream fails ("false" logs just the error)
+UVICORN_LOOP = os.getenv("UVICORN_LOOP", "asyncio")  # "uvloop" (bundled with uvicorn[standard]) for a faster event loop
 
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
@@ -77,8 +97,9 @@ if SUPABASE_KEY:
 else:
     print("[DEBUG] SUPABASE_KEY is MISSING!", flush=True)
 
+@lru_cache(maxsize=1)
 def get_public_url():
-    """Get the public URL - Railway in production, ngrok for local dev"""
+    """Get the public URL - Railway in production, ngrok for local dev (resolved once; the ngrok lookup blocks)"""
     # Check if running on Railway
     railway_domain = os.getenv("RAILWAY_PUBLIC_DOMAIN") or os.getenv("RAILWAY_STATIC_URL")
     if railway_domain:
@@ -115,16 +136,38 @@ PUBLIC_BASE = get_public_url()  # Railway in production, ngrok for local dev
 VOICE = os.getenv("VOICE", "echo")  # Options: alloy, echo, fable, onyx, nova, shimmer
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.8"))
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-realtime-preview-2024-12-17")  # OpenAI Realtime API model
+REALTIME_CLIENT_TOKEN = os.getenv("REALTIME_CLIENT_TOKEN", "")  # Bearer token browsers send to /realtime/ephemeral (unset = endpoint disabled)
 
 # WebSocket configuration
 MAX_CALL_DURATION = int(os.getenv("MAX_CALL_DURATION", "3600"))  # 1 hour default (seconds)
 WEBSOCKET_PING_INTERVAL = int(os.getenv("WEBSOCKET_PING_INTERVAL", "20"))  # 20 seconds
 WEBSOCKET_PING_TIMEOUT = int(os.getenv("WEBSOCKET_PING_TIMEOUT", "10"))  # 10 seconds
+# Local barge-in (off by default): caller audio RMS (16-bit PCM scale) that counts as talking over
+# the assistant, and how many consecutive 20ms frames it takes. 0 leaves interruptions to server_vad.
+LOCAL_BARGE_IN_RMS = int(os.getenv("LOCAL_BARGE_IN_RMS", "0"))
+LOCAL_BARGE_IN_FRAMES = int(os.getenv("LOCAL_BARGE_IN_FRAMES", "3"))
+TWILIO_AUDIO_MAX_BATCH = int(os.getenv("TWILIO_AUDIO_MAX_BATCH", "4"))  # Max OpenAI audio deltas merged into one Twilio media frame
+OPENAI_AUDIO_APPEND_FRAMES = int(os.getenv("OPENAI_AUDIO_APPEND_FRAMES", "3"))  # 20ms caller frames per input_audio_buffer.append (1 = no batching)
+OPENAI_WS_COMPRESSION = os.getenv("OPENAI_WS_COMPRESSION", "deflate")  # permessage-deflate on the OpenAI socket ("none" to disable)
+OPENAI_WS_MAX_SIZE = int(os.getenv("OPENAI_WS_MAX_SIZE", str(2 ** 22)))  # Largest OpenAI event accepted (bytes)
+OPENAI_WS_POOL_SIZE = int(os.getenv("OPENAI_WS_POOL_SIZE", "2"))  # Pre-connected idle OpenAI sockets (0 = connect per call)
+OPENAI_WS_POOL_MAX_AGE = int(os.getenv("OPENAI_WS_POOL_MAX_AGE", "600"))  # Seconds a warm socket may idle before it's replaced
+
+# Call session storage
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))  # Max concurrent sessions kept in memory
+SESSION_TTL_GRACE = int(os.getenv("SESSION_TTL_GRACE", "600"))  # Seconds past MAX_CALL_DURATION before a session is evicted
+BUSINESS_CACHE_TTL = int(os.getenv("BUSINESS_CACHE_TTL", "300"))  # Seconds a phone -> business lookup is reused
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "8"))  # Threads for Supabase calls made from async handlers
+TRANSCRIPT_FLUSH_INTERVAL = int(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "30"))  # Seconds between transcript batch writes
+TRANSCRIPT_FLUSH_ROWS = int(os.getenv("TRANSCRIPT_FLUSH_ROWS", "20"))  # Queued lines that trigger an early write for a call
+TRANSCRIPT_FLUSH_ATTEMPTS = int(os.getenv("TRANSCRIPT_FLUSH_ATTEMPTS", "3"))  # Failed writes of a call's lines before they're dropped
 
 # Email configuration
 FROM_EMAIL = os.getenv("FROM_EMAIL", "noreply@boltaigroup.com")
 REPLY_TO_EMAIL = "boltaigroup@gmail.com"  # Bolt AI Group primary email
 BUSINESS_OWNER_EMAIL = "boltaigroup@gmail.com"  # Bolt AI Group primary email
+DIGEST_RECIPIENTS = [e.strip() for e in os.getenv("DIGEST_RECIPIENTS", BUSINESS_OWNER_EMAIL).split(",") if e.strip()]  # Daily digest goes to each
+DIGEST_MAX_PARALLEL_SENDS = int(os.getenv("DIGEST_MAX_PARALLEL_SENDS", "5"))  # Concurrent digest sends (Resend rate limit)
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 SMTP_HOST = os.getenv("SMTP_HOST", "smtp.mail.yahoo.com")
@@ -143,6 +186,9 @@ TRIAL_SIGNUP_URL = os.getenv("TRIAL_SIGNUP_URL", "https://criton.ai/signup")
 # Google Calendar configuration
 GOOGLE_CALENDAR_EMAIL = os.getenv("GOOGLE_CALENDAR_EMAIL", "boltaigroup@gmail.com")
 GOOGLE_CALENDAR_SERVICE_ACCOUNT = os.getenv("GOOGLE_CALENDAR_SERVICE_ACCOUNT", "/Users/anthony/aiagent/keys/calendar-sa.json")
+GOOGLE_CALENDAR_TIMEOUT = int(os.getenv("GOOGLE_CALENDAR_TIMEOUT", "10"))  # Seconds per Calendar API request
+GOOGLE_CALENDAR_RETRIES = int(os.getenv("GOOGLE_CALENDAR_RETRIES", "3"))  # Retries with backoff on 429/5xx
+CALENDAR_EVENTS_CACHE_TTL = int(os.getenv("CALENDAR_EVENTS_CACHE_TTL", "45"))  # Seconds an events().list result is reused
 
 # Sentry configuration (error tracking)
 SENTRY_DSN = os.getenv("SENTRY_DSN")
@@ -197,13 +243,12 @@ else:
 
 def send_trial_link_sms(to_number: str) -> bool:
     """Send the Criton AI trial signup link via SMS."""
-    if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN or not TWILIO_NUMBER:
+    if not TWILIO_CLIENT or not TWILIO_NUMBER:
         log("[SMS ERROR] Twilio not configured for SMS")
         return False
     try:
-        client = TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
         message = f"Hey! It was great chatting. Here's the link to get started with Criton AI — your 24/7 AI phone assistant: {TRIAL_SIGNUP_URL}"
-        msg = client.messages.create(body=message, from_=TWILIO_NUMBER, to=to_number)
+        msg = TWILIO_CLIENT.messages.create(body=message, from_=TWILIO_NUMBER, to=to_number)
         log(f"[SMS] Trial link sent to {to_number} - SID: {msg.sid}")
         return True
     except Exception as e:
@@ -213,7 +258,24 @@ def send_trial_link_sms(to_number: str) -> bool:
 # ======================== Globals ========================
 app = FastAPI()
 SUPABASE = None  # Lazy-initialized on first use
-SESSIONS = {}  # call_sid -> session data
+# One Twilio REST client per process - its HTTP session keeps the connection to api.twilio.com alive
+TWILIO_CLIENT = TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN) if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN else None
+# call_sid -> session data. Bounded with a TTL so sessions whose status callback never
+# arrives (lost webhook, crash mid-call) are evicted instead of piling up
+# Per-process: /voice/incoming, /media-stream and /status for a call must hit the same
+# process (we run a single uvicorn worker - see SCALING_GUIDE.md before adding workers)
+SESSIONS = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=MAX_CALL_DURATION + SESSION_TTL_GRACE)
+BUSINESS_CACHE = TTLCache(maxsize=1024, ttl=BUSINESS_CACHE_TTL)  # phone -> business row (only found businesses are cached)
+BUSINESS_CACHE_LOCK = threading.Lock()  # Lookups run on DB_EXECUTOR threads; TTLCache isn't thread-safe
+CALENDAR_EVENTS_CACHE = TTLCache(maxsize=64, ttl=CALENDAR_EVENTS_CACHE_TTL)  # (calendar, minute range) -> events
+CALENDAR_EVENTS_LOCK = threading.Lock()  # Held across the fetch so concurrent misses share one Google request
+CALENDAR_HTTP_LOCK = threading.Lock()  # The Calendar service's keep-alive httplib2 connection isn't thread-safe
+_BACKGROUND_TASKS = set()  # In-flight fire-and-forget tasks (end-of-call emails)
+_TRANSCRIPT_BUFFERS = defaultdict(list)  # call_sid -> transcript rows not yet written to call_transcripts
+_TRANSCRIPT_LOCK = threading.Lock()  # Lines are queued on the event loop but flushed from DB_EXECUTOR threads
+_TRANSCRIPT_EARLY_FLUSHES = set()  # call_sids with an early (TRANSCRIPT_FLUSH_ROWS) flush in flight
+_TRANSCRIPT_FLUSH_FAILURES = {}  # call_sid -> consecutive failed writes of its queued lines
+RESEND_HTTP = requests.Session()  # Keep-alive connection to the Resend API, reused across emails
 SERVER_START_TIME = time.time()  # Track uptime
 CALL_METRICS = defaultdict(lambda: {
     "total_calls": 0,
@@ -241,7 +303,6 @@ def get_supabase_client():
             log(f"[DEBUG] Supabase client created successfully - type: {type(SUPABASE)}")
         except Exception as e:
             log(f"[ERROR] Failed to create Supabase client: {e}")
-            import traceback
             log(f"[ERROR] Traceback: {traceback.format_exc()}")
             return None
     else:
@@ -251,16 +312,63 @@ def get_supabase_client():
     return SUPABASE
 
 # ======================== Logging ========================
+# log() only enqueues; a listener thread does the stdout writes so the event loop never blocks on them
+_LOG_QUEUE = queue.SimpleQueue()
+_LOGGER = logging.getLogger("bolt")
+_LOGGER.setLevel(LOG_LEVEL)
+_LOGGER.propagate = False
+_LOGGER.addHandler(logging.handlers.QueueHandler(_LOG_QUEUE))
+_LOG_LISTENER = logging.handlers.QueueListener(_LOG_QUEUE, logging.StreamHandler(sys.stdout))
+_LOG_LISTENER.start()
+atexit.register(_LOG_LISTENER.stop)  # Flush what's queued on exit
+_DEBUG_LOGGING = _LOGGER.isEnabledFor(logging.DEBUG)
+
 def log(msg, **kwargs):
-    timestamp = datetime.utcnow().isoformat() + "Z"
-    print(f"{timestamp} {msg}", flush=True)
+    # The level comes from the line's tag: "[DEBUG]" lines are dropped unless LOG_LEVEL=DEBUG,
+    # error/critical lines log as ERROR and "[WARN]" lines as WARNING, so LOG_LEVEL filters by severity
+    msg_upper = msg.upper()
+    if "DEBUG]" in msg:
+        if not _DEBUG_LOGGING:
+            return
+        level = logging.DEBUG
+    elif "ERROR" in msg_upper or "CRITICAL" in msg_upper:
+        level = logging.ERROR
+    elif "[WARN" in msg_upper or "WARNING" in msg_upper:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    _LOGGER.log(level, f"{timestamp} {msg}")
 
     # Log to Sentry if critical error
-    if "ERROR" in msg.upper() or "CRITICAL" in msg.upper():
+    if "ERROR" in msg_upper or "CRITICAL" in msg_upper:
         if SENTRY_AVAILABLE and SENTRY_DSN:
             sentry_sdk.capture_message(msg, level="error")
 
 # ======================== WebSocket Helpers ========================
+# One TLS context for all outbound websockets - loading the certifi CA bundle is not free
+_SSL_CTX = ssl.create_default_context(cafile=certifi.where())
+
+async def open_openai_ws():
+    """Open one OpenAI Realtime WebSocket (no retries)"""
+    return await asyncio.wait_for(
+        websockets.connect(
+            f"wss://api.openai.com/v1/realtime?model={MODEL}",
+            extra_headers={
+                "Authorization": f"Bearer {OPENAI_API_KEY}",
+                "OpenAI-Beta": "realtime=v1"
+            },
+            ssl=_SSL_CTX,
+            ping_interval=WEBSOCKET_PING_INTERVAL,
+            ping_timeout=WEBSOCKET_PING_TIMEOUT,
+            open_timeout=WS_CONNECTION_TIMEOUT,
+            # Shrinks the JSON events; costs CPU on every audio frame too, so it's switchable
+            compression=None if OPENAI_WS_COMPRESSION == "none" else OPENAI_WS_COMPRESSION,
+            max_size=OPENAI_WS_MAX_SIZE
+        ),
+        timeout=WS_CONNECTION_TIMEOUT
+    )
+
 async def connect_to_openai_with_retry(max_retries=WS_MAX_RETRIES):
     """
     Connect to OpenAI Realtime API with exponential backoff retry logic.
@@ -268,8 +376,6 @@ async def connect_to_openai_with_retry(max_retries=WS_MAX_RETRIES):
     Returns:
         websocket connection or None if all retries failed
     """
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
-
     for attempt in range(max_retries):
         try:
             retry_delay = WS_RETRY_DELAY_BASE * (2 ** attempt)  # Exponential backoff: 1s, 2s, 4s
@@ -280,20 +386,7 @@ async def connect_to_openai_with_retry(max_retries=WS_MAX_RETRIES):
 
             log(f"[WS] Connecting to OpenAI Realtime API (attempt {attempt + 1}/{max_retries})...")
 
-            openai_ws = await asyncio.wait_for(
-                websockets.connect(
-                    f"wss://api.openai.com/v1/realtime?model={MODEL}",
-                    extra_headers={
-                        "Authorization": f"Bearer {OPENAI_API_KEY}",
-                        "OpenAI-Beta": "realtime=v1"
-                    },
-                    ssl=ssl_context,
-                    ping_interval=WEBSOCKET_PING_INTERVAL,
-                    ping_timeout=WEBSOCKET_PING_TIMEOUT,
-                    open_timeout=WS_CONNECTION_TIMEOUT
-                ),
-                timeout=WS_CONNECTION_TIMEOUT
-            )
+            openai_ws = await open_openai_ws()
 
             log(f"✓ OpenAI WebSocket connected successfully on attempt {attempt + 1}")
             CALL_METRICS["websocket"]["websocket_reconnections"] += attempt  # Track reconnection attempts
@@ -336,6 +429,83 @@ async def ws_heartbeat(websocket, interval=20):
     except asyncio.CancelledError:
         log("[INFO] Heartbeat cancelled")
 
+# Idle, already-handshaken OpenAI sockets so a new call skips TCP + TLS + WS setup
+_OPENAI_WS_POOL = asyncio.Queue()  # (opened_at, websocket) - monotonic time the socket was connected
+_openai_ws_pool_refilling = False
+_openai_ws_pool_recycle_task = None  # Periodic recycle_openai_ws_pool loop (kept so it isn't garbage-collected)
+
+def _is_fresh_openai_ws(opened_at, openai_ws):
+    """Still open and young enough that the server won't expire its session mid-call"""
+    return openai_ws.open and time.monotonic() - opened_at < OPENAI_WS_POOL_MAX_AGE
+
+async def refill_openai_ws_pool():
+    """Top the warm pool back up to OPENAI_WS_POOL_SIZE sockets"""
+    global _openai_ws_pool_refilling
+    if _openai_ws_pool_refilling:
+        return
+    _openai_ws_pool_refilling = True
+    try:
+        while _OPENAI_WS_POOL.qsize() < OPENAI_WS_POOL_SIZE:
+            try:
+                openai_ws = await open_openai_ws()
+                _OPENAI_WS_POOL.put_nowait((time.monotonic(), openai_ws))
+            except Exception as e:
+                log(f"[WARN] Could not pre-connect OpenAI WebSocket: {type(e).__name__}: {e}")
+                break
+        log(f"[WS] OpenAI warm pool: {_OPENAI_WS_POOL.qsize()}/{OPENAI_WS_POOL_SIZE}")
+    finally:
+        _openai_ws_pool_refilling = False
+
+async def acquire_openai_ws():
+    """Take a warm OpenAI socket from the pool (dropping closed or stale ones), else connect with retries"""
+    openai_ws = None
+    while not _OPENAI_WS_POOL.empty():
+        opened_at, candidate = _OPENAI_WS_POOL.get_nowait()
+        if _is_fresh_openai_ws(opened_at, candidate):
+            openai_ws = candidate
+            log("[WS] Using pre-connected OpenAI WebSocket")
+            break
+        spawn_background_task(candidate.close())
+
+    if OPENAI_WS_POOL_SIZE > 0:
+        spawn_background_task(refill_openai_ws_pool())
+
+    return openai_ws or await connect_to_openai_with_retry(max_retries=WS_MAX_RETRIES)
+
+async def recycle_openai_ws_pool():
+    """Replace warm sockets the server closed or that idled past OPENAI_WS_POOL_MAX_AGE, between calls"""
+    while True:
+        await asyncio.sleep(max(OPENAI_WS_POOL_MAX_AGE // 2, 30))
+        try:
+            # Sort the pool without awaiting, so a call arriving mid-sweep still finds the fresh sockets
+            pooled = [_OPENAI_WS_POOL.get_nowait() for _ in range(_OPENAI_WS_POOL.qsize())]
+            stale = []
+            for opened_at, openai_ws in pooled:
+                if _is_fresh_openai_ws(opened_at, openai_ws):
+                    _OPENAI_WS_POOL.put_nowait((opened_at, openai_ws))
+                else:
+                    stale.append(openai_ws)
+            for openai_ws in stale:
+                await openai_ws.close()
+            await refill_openai_ws_pool()
+        except Exception as e:
+            log(f"[WARN] Error recycling OpenAI warm pool: {type(e).__name__}: {e}")
+
+@app.on_event("startup")
+async def warm_openai_ws_pool():
+    global _openai_ws_pool_recycle_task
+    if OPENAI_WS_POOL_SIZE > 0 and OPENAI_API_KEY:
+        spawn_background_task(refill_openai_ws_pool())
+        _openai_ws_pool_recycle_task = asyncio.create_task(recycle_openai_ws_pool())
+
+@app.on_event("shutdown")
+async def close_openai_ws_pool():
+    if _openai_ws_pool_recycle_task:
+        _openai_ws_pool_recycle_task.cancel()
+    while not _OPENAI_WS_POOL.empty():
+        _, openai_ws = _OPENAI_WS_POOL.get_nowait()
+        await openai_ws.close()
+
 # ======================== ElevenLabs Integration ========================
 def elevenlabs_tts_sync(text: str) -> str:
     """
@@ -387,6 +557,7 @@ async def elevenlabs_tts_async(text: str) -> str:
     return await loop.run_in_executor(None, elevenlabs_tts_sync, text)
 
 # ======================== Database ========================
+FAILED_CALL_STATUSES = frozenset({'failed', 'busy', 'no-answer'})  # Twilio statuses counted as failed/missed
 
 # Fallback business config from environment (used only if database is unavailable)
 # This ensures calls can still be answered even during brief DB outages
@@ -412,7 +583,12 @@ def get_fallback_config():
     }
 
 def get_business_for_phone(phone):
-    """Look up business by phone number from database"""
+    """Look up business by phone number from database (cached for BUSINESS_CACHE_TTL seconds)"""
+    with BUSINESS_CACHE_LOCK:
+        business = BUSINESS_CACHE.get(phone)
+    if business:
+        return business
+
     supabase = get_supabase_client()
     if not supabase:
         log(f"[WARN] SUPABASE client is None")
@@ -423,8 +599,8 @@ def get_business_for_phone(phone):
 
     try:
         log(f"[DEBUG] Querying phone_numbers table for: {phone}")
-        result = supabase.table('phone_numbers').select('business_id').eq('phone_number', phone).execute()
-        log(f"[DEBUG] Phone lookup result: {result.data}")
+        # Embed the business via the phone_numbers.business_id foreign key - one request instead of two
+        result = supabase.table('phone_numbers').select('business_id, businesses(*)').eq('phone_number', phone).limit(1).execute()
         if not result.data:
             log(f"[WARN] Phone {phone} not found in database")
             # Try fallback only for configured phone
@@ -432,13 +608,14 @@ def get_business_for_phone(phone):
                 log(f"[WARN] Using env-based fallback config")
                 return get_fallback_config()
             return None
-        business_id = result.data[0]['business_id']
-        log(f"[DEBUG] Found business_id: {business_id}, fetching business details...")
-        biz_result = supabase.table('businesses').select('*').eq('id', business_id).execute()
-        log(f"[DEBUG] Business lookup successful: {biz_result.data[0]['business_name'] if biz_result.data else 'None'}")
-        return biz_result.data[0] if biz_result.data else None
+        business = result.data[0].get('businesses')
+        log(f"[DEBUG] Business lookup for business_id {result.data[0]['business_id']}: {business['business_name'] if business else 'None'}")
+        if not business:
+            return None
+        with BUSINESS_CACHE_LOCK:
+            BUSINESS_CACHE[phone] = business
+        return business
     except Exception as e:
-        import traceback
         log(f"[ERROR] Database error in get_business_for_phone: {e}")
         # Try fallback only for configured phone during DB errors
         if FALLBACK_PHONE and phone == FALLBACK_PHONE:
@@ -446,6 +623,21 @@ def get_business_for_phone(phone):
             return get_fallback_config()
         return None
 
+def preload_business_cache():
+    """Load every phone number's business into BUSINESS_CACHE so inbound calls skip the database"""
+    supabase = get_supabase_client()
+    if not supabase:
+        return
+
+    try:
+        result = supabase.table('phone_numbers').select('phone_number, businesses(*)').execute()
+        businesses = {row['phone_number']: row['businesses'] for row in result.data or [] if row.get('businesses')}
+        with BUSINESS_CACHE_LOCK:
+            BUSINESS_CACHE.update(businesses)
+        log(f"Business cache loaded: {len(businesses)} phone number(s)")
+    except Exception as e:
+        log(f"[WARN] Could not preload business cache: {e}")
+
 def create_call_record(business_id, from_number, call_sid, to_number):
     """Create a call record in the database"""
     if not SUPABASE:
@@ -465,19 +657,100 @@ def create_call_record(business_id, from_number, call_sid, to_number):
         log(f"Error creating call record: {e}")
         return None
 
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="db")
+
+async def db_call(fn, *args, **kwargs):
+    """Run a blocking Supabase call on DB_EXECUTOR so it doesn't stall the event loop (and live audio)"""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, partial(fn, *args, **kwargs))
+
 def update_call_transcript(call_sid, role, text):
-    """Update call transcript — inserts into call_transcripts table using Twilio call SID"""
+    """Queue a transcript line for call_transcripts (keyed by Twilio call SID); written by flush_call_transcripts.
+    Called from the media stream handlers on the event loop."""
     if not call_sid or not SUPABASE:
         return
 
+    # created_at is set here so lines keep their spoken order after a bulk insert
+    row = {
+        "call_sid": call_sid,
+        "role": role,
+        "content": text,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    # Busy call - write this batch now instead of waiting for the periodic flush. ">=" because
+    # a failed flush puts its rows back; one early flush per call is in flight at a time.
+    with _TRANSCRIPT_LOCK:
+        rows = _TRANSCRIPT_BUFFERS[call_sid]
+        rows.append(row)
+        flush_now = len(rows) >= TRANSCRIPT_FLUSH_ROWS and call_sid not in _TRANSCRIPT_EARLY_FLUSHES
+        if flush_now:
+            _TRANSCRIPT_EARLY_FLUSHES.add(call_sid)
+    if flush_now:
+        spawn_background_task(db_call(_flush_busy_call_transcripts, call_sid))
+
+def _flush_busy_call_transcripts(call_sid):
+    """Early flush started by update_call_transcript; clears the call's in-flight mark when done"""
     try:
-        SUPABASE.table('call_transcripts').insert({
-            "call_sid": call_sid,
-            "role": role,
-            "content": text
-        }).execute()
+        flush_call_transcripts(call_sid)
+    finally:
+        with _TRANSCRIPT_LOCK:
+            _TRANSCRIPT_EARLY_FLUSHES.discard(call_sid)
+
+def flush_call_transcripts(call_sid):
+    """Insert all queued transcript lines for a call in one query"""
+    with _TRANSCRIPT_LOCK:
+        rows = _TRANSCRIPT_BUFFERS.pop(call_sid, None)
+    if not rows or not SUPABASE:
+        return
+
+    try:
+        SUPABASE.table('call_transcripts').insert(rows).execute()
     except Exception as e:
-        log(f"Error updating transcript: {e}")
+        with _TRANSCRIPT_LOCK:
+            failures = _TRANSCRIPT_FLUSH_FAILURES.get(call_sid, 0) + 1
+            if failures < TRANSCRIPT_FLUSH_ATTEMPTS:
+                # Put them back in front of anything queued meanwhile; the next flush retries
+                _TRANSCRIPT_FLUSH_FAILURES[call_sid] = failures
+                _TRANSCRIPT_BUFFERS[call_sid][:0] = rows
+            else:
+                # Rejected rows or a long outage - don't hold (and retry) them forever
+                _TRANSCRIPT_FLUSH_FAILURES.pop(call_sid, None)
+        if failures < TRANSCRIPT_FLUSH_ATTEMPTS:
+            log(f"Error updating transcript (attempt {failures}/{TRANSCRIPT_FLUSH_ATTEMPTS}): {e}")
+        else:
+            log(f"[ERROR] Dropping {len(rows)} transcript line(s) for call {call_sid} after {failures} failed writes: {e}")
+    else:
+        with _TRANSCRIPT_LOCK:
+            _TRANSCRIPT_FLUSH_FAILURES.pop(call_sid, None)
+
+def flush_all_call_transcripts():
+    """Flush queued transcript lines for every call"""
+    with _TRANSCRIPT_LOCK:
+        call_sids = list(_TRANSCRIPT_BUFFERS)
+    for call_sid in call_sids:
+        flush_call_transcripts(call_sid)
+
+async def flush_transcripts_periodically():
+    """Write queued transcripts every TRANSCRIPT_FLUSH_INTERVAL seconds so long calls aren't held in memory"""
+    while True:
+        await asyncio.sleep(TRANSCRIPT_FLUSH_INTERVAL)
+        try:
+            await db_call(flush_all_call_transcripts)
+        except Exception as e:
+            log(f"Error flushing transcripts: {e}")
+
+_transcript_flush_task = None  # The loop only holds tasks weakly - keep the flusher alive
+
+@app.on_event("startup")
+async def start_transcript_flusher():
+    global _transcript_flush_task
+    _transcript_flush_task = asyncio.create_task(flush_transcripts_periodically())
+
+@app.on_event("shutdown")
+async def flush_transcripts_on_shutdown():
+    if _transcript_flush_task:
+        _transcript_flush_task.cancel()
+    flush_all_call_transcripts()
 
 # ======================== Email ========================
 def send_email(to_email, subject, body_html, max_retries=3):
@@ -491,15 +764,10 @@ def send_email(to_email, subject, body_html, max_retries=3):
         log(f"Email send skipped - invalid recipient: {to_email}")
         return False
 
-    import time
-
     for attempt in range(max_retries):
         # Try Resend first (more reliable)
         if RESEND_API_KEY:
             try:
-                import resend
-                resend.api_key = RESEND_API_KEY
-
                 params = {
                     "from": f"{AGENT_NAME} <{FROM_EMAIL}>",
                     "to": [to_email],
@@ -508,7 +776,13 @@ def send_email(to_email, subject, body_html, max_retries=3):
                     "reply_to": REPLY_TO_EMAIL
                 }
 
-                email = resend.Emails.send(params)
+                response = RESEND_HTTP.post(
+                    "https://api.resend.com/emails",
+                    json=params,
+                    headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
+                    timeout=10
+                )
+                response.raise_for_status()
                 log(f"Email sent via Resend to {to_email}")
                 return True
             except Exception as e:
@@ -521,9 +795,6 @@ def send_email(to_email, subject, body_html, max_retries=3):
 
         # Fallback to SMTP if Resend fails or not configured
         try:
-            import smtplib
-            from email.mime.text import MIMEText
-            from email.mime.multipart import MIMEMultipart
 
             msg = MIMEMultipart('alternative')
             msg['Subject'] = subject
@@ -553,17 +824,15 @@ def send_email(to_email, subject, body_html, max_retries=3):
 
 def send_instant_call_alert(call_sid, caller_phone, call_start_time):
     """Send instant email alert when a call comes in"""
-    import pytz
     subject = f"🔔 Incoming Call Alert - {caller_phone}"
 
     # Convert to PST for display
     if isinstance(call_start_time, datetime):
-        pacific = pytz.timezone('America/Los_Angeles')
         if call_start_time.tzinfo is None:
             # Assume UTC if naive datetime (Railway runs in UTC)
             utc = pytz.UTC
             call_start_time = utc.localize(call_start_time)
-        call_time_pst = call_start_time.astimezone(pacific)
+        call_time_pst = call_start_time.astimezone(_PACIFIC)
         call_time_formatted = call_time_pst.strftime("%I:%M %p")
     else:
         call_time_formatted = str(call_start_time)
@@ -601,7 +870,6 @@ def send_post_call_summary(call_sid, caller_phone, customer_name=None, customer_
                            customer_phone=None, business_type=None, company_name=None,
                            appointment_display=None, call_start_time=None):
     """Send post-call summary email with transcript to business owner"""
-    import pytz
 
     # Calculate duration
     duration_str = "Unknown"
@@ -614,11 +882,9 @@ def send_post_call_summary(call_sid, caller_phone, customer_name=None, customer_
     # Format call time in PST
     call_time_formatted = "Unknown"
     if isinstance(call_start_time, datetime):
-        pacific = pytz.timezone('America/Los_Angeles')
         if call_start_time.tzinfo is None:
-            import pytz as tz
-            call_start_time = tz.UTC.localize(call_start_time)
-        call_time_pst = call_start_time.astimezone(pacific)
+            call_start_time = pytz.UTC.localize(call_start_time)
+        call_time_pst = call_start_time.astimezone(_PACIFIC)
         call_time_formatted = call_time_pst.strftime("%B %d, %Y at %I:%M %p PST")
 
     # Fetch transcript from Supabase
@@ -685,6 +951,28 @@ def send_post_call_summary(call_sid, caller_phone, customer_name=None, customer_
 
     return send_email(BUSINESS_OWNER_EMAIL, subject, body_html)
 
+# One row of the daily digest's call table
+_DIGEST_CALL_ROW_HTML = """
+            <tr>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{call_time}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{from_number}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;"><span style="color: {status_color}; font-weight: bold;">{status}</span></td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{duration}</td>
+            </tr>
+            """
+
+def _fetch_daily_call_stats(supabase, day_start, day_end):
+    """Today's call counts from the daily_call_stats SQL function, or None if it isn't installed"""
+    try:
+        result = supabase.rpc('daily_call_stats', {
+            "day_start": day_start.isoformat(),
+            "day_end": day_end.isoformat()
+        }).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        log(f"[WARN] daily_call_stats unavailable, counting calls in Python (run migrations/003_daily_call_stats.sql): {e}")
+        return None
+
 def send_daily_digest():
     """Send daily digest with call analytics"""
     supabase = get_supabase_client()
@@ -697,45 +985,60 @@ def send_daily_digest():
         today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         today_end = datetime.now().replace(hour=23, minute=59, second=59, microsecond=999999)
 
-        # Query today's calls
-        result = supabase.table('calls').select('*').gte('created_at', today_start.isoformat()).lte('created_at', today_end.isoformat()).execute()
-
-        calls = result.data if result.data else []
-        total_calls = len(calls)
-
-        if total_calls == 0:
-            log("No calls today - skipping daily digest")
-            return True  # Not an error, just no calls
-
-        # Analytics
-        completed_calls = [c for c in calls if c.get('status') == 'completed']
-        failed_calls = [c for c in calls if c.get('status') in ['failed', 'busy', 'no-answer']]
-        in_progress_calls = [c for c in calls if c.get('status') == 'in-progress']
-
-        # Calculate call durations
-        total_duration = 0
-        for call in completed_calls:
-            if call.get('duration'):
-                total_duration += int(call['duration'])
-
-        avg_duration = (total_duration / len(completed_calls)) if completed_calls else 0
+        # Counts come from the daily_call_stats function (migrations/003) in one small response;
+        # only the 10 calls shown in the table are fetched
+        stats = _fetch_daily_call_stats(supabase, today_start, today_end)
+        if stats:
+            total_calls = stats['total']
+            if total_calls == 0:
+                log("No calls today - skipping daily digest")
+                return True  # Not an error, just no calls
+
+            recent_result = supabase.table('calls').select('created_at, from_number, status, duration').gte('created_at', today_start.isoformat()).lte('created_at', today_end.isoformat()).order('created_at', desc=True).limit(10).execute()
+            recent_calls = recent_result.data or []
+        else:
+            # Function not installed yet - fetch the whole day and count here
+            result = supabase.table('calls').select('*').gte('created_at', today_start.isoformat()).lte('created_at', today_end.isoformat()).execute()
+
+            calls = result.data if result.data else []
+            total_calls = len(calls)
+
+            if total_calls == 0:
+                log("No calls today - skipping daily digest")
+                return True  # Not an error, just no calls
+
+            # Analytics - one pass over the calls
+            stats = {"total": total_calls, "completed": 0, "failed": 0, "in_progress": 0, "total_duration": 0}
+            for call in calls:
+                status = call.get('status')
+                if status == 'completed':
+                    stats['completed'] += 1
+                    if call.get('duration'):
+                        stats['total_duration'] += int(call['duration'])
+                elif status in FAILED_CALL_STATUSES:
+                    stats['failed'] += 1
+                elif status == 'in-progress':
+                    stats['in_progress'] += 1
+            recent_calls = calls[:10]
+
+        avg_duration = (stats['total_duration'] / stats['completed']) if stats['completed'] else 0
         avg_duration_formatted = f"{int(avg_duration // 60)}m {int(avg_duration % 60)}s"
 
         # Build call list HTML
-        call_rows = ""
-        for call in calls[:10]:  # Show up to 10 most recent calls
-            status_color = "#4CAF50" if call.get('status') == 'completed' else ("#f44336" if call.get('status') in ['failed', 'busy', 'no-answer'] else "#ff9800")
+        call_rows = []
+        for call in recent_calls:  # Show up to 10 most recent calls
+            status_color = "#4CAF50" if call.get('status') == 'completed' else ("#f44336" if call.get('status') in FAILED_CALL_STATUSES else "#ff9800")
             call_time = datetime.fromisoformat(call['created_at'].replace('Z', '+00:00')).strftime("%I:%M %p")
             duration = f"{int(call.get('duration', 0) // 60)}m {int(call.get('duration', 0) % 60)}s" if call.get('duration') else "N/A"
 
-            call_rows += f"""
-            <tr>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{call_time}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{call.get('from_number', 'Unknown')}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;"><span style="color: {status_color}; font-weight: bold;">{call.get('status', 'unknown')}</span></td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{duration}</td>
-            </tr>
-            """
+            call_rows.append(_DIGEST_CALL_ROW_HTML.format(
+                call_time=call_time,
+                from_number=call.get('from_number', 'Unknown'),
+                status_color=status_color,
+                status=call.get('status', 'unknown'),
+                duration=duration
+            ))
+        call_rows = "".join(call_rows)
 
         # Subject
         date_str = today_start.strftime("%B %d, %Y")
@@ -758,15 +1061,15 @@ def send_daily_digest():
                         <p style="margin: 5px 0 0 0; color: #666;">Total Calls</p>
                     </div>
                     <div style="flex: 1; min-width: 200px; background-color: #e8f5e9; padding: 20px; border-radius: 8px; text-align: center;">
-                        <h2 style="margin: 0; color: #4CAF50; font-size: 36px;">{len(completed_calls)}</h2>
+                        <h2 style="margin: 0; color: #4CAF50; font-size: 36px;">{stats['completed']}</h2>
                         <p style="margin: 5px 0 0 0; color: #666;">Completed</p>
                     </div>
                     <div style="flex: 1; min-width: 200px; background-color: #fff3e0; padding: 20px; border-radius: 8px; text-align: center;">
-                        <h2 style="margin: 0; color: #ff9800; font-size: 36px;">{len(in_progress_calls)}</h2>
+                        <h2 style="margin: 0; color: #ff9800; font-size: 36px;">{stats['in_progress']}</h2>
                         <p style="margin: 5px 0 0 0; color: #666;">In Progress</p>
                     </div>
                     <div style="flex: 1; min-width: 200px; background-color: #ffebee; padding: 20px; border-radius: 8px; text-align: center;">
-                        <h2 style="margin: 0; color: #f44336; font-size: 36px;">{len(failed_calls)}</h2>
+                        <h2 style="margin: 0; color: #f44336; font-size: 36px;">{stats['failed']}</h2>
                         <p style="margin: 5px 0 0 0; color: #666;">Failed/Missed</p>
                     </div>
                 </div>
@@ -804,12 +1107,17 @@ def send_daily_digest():
         </html>
         """
 
-        log(f"Sending daily digest: {total_calls} calls today")
-        return send_email(BUSINESS_OWNER_EMAIL, subject, body_html)
+        log(f"Sending daily digest: {total_calls} calls today to {len(DIGEST_RECIPIENTS)} recipient(s)")
+        if len(DIGEST_RECIPIENTS) == 1:
+            return send_email(DIGEST_RECIPIENTS[0], subject, body_html)
+
+        # Send concurrently so the total time is roughly one send, not one per recipient
+        with ThreadPoolExecutor(max_workers=DIGEST_MAX_PARALLEL_SENDS) as executor:
+            results = list(executor.map(lambda to_email: send_email(to_email, subject, body_html), DIGEST_RECIPIENTS))
+        return all(results)
 
     except Exception as e:
         log(f"Error generating daily digest: {e}")
-        import traceback
         log(f"Traceback: {traceback.format_exc()}")
         return False
 
@@ -866,84 +1174,84 @@ def send_business_owner_notification(customer_name, customer_email, customer_pho
 
     return send_email(owner_email, subject, body_html)
 
+# Business-specific benefits
+_DEMO_BENEFITS = {
+    "restaurant": [
+        "Take reservations 24/7, even when you're slammed during dinner rush",
+        "Answer common questions about hours, menu, and dietary restrictions",
+        "Reduce no-shows with automated SMS/email confirmations",
+        "Handle takeout orders and special requests"
+    ],
+    "salon": [
+        "Book appointments instantly while you're with clients",
+        "Send automated appointment reminders to reduce no-shows",
+        "Answer questions about services, pricing, and availability",
+        "Manage cancellations and rescheduling automatically"
+    ],
+    "medical": [
+        "Schedule patient appointments 24/7",
+        "Answer FAQs about office hours, insurance, and procedures",
+        "Send automated appointment reminders",
+        "Route urgent calls appropriately"
+    ],
+    "dental": [
+        "Book appointments while you're with patients",
+        "Answer questions about procedures, insurance, and costs",
+        "Send automated reminders to reduce no-shows",
+        "Handle emergency calls with proper routing"
+    ],
+    "spa": [
+        "Book treatments anytime, day or night",
+        "Answer questions about services, packages, and gift certificates",
+        "Send appointment confirmations and reminders",
+        "Upsell add-on services during booking"
+    ],
+    "contractor": [
+        "Capture every lead, even when you're on a job site",
+        "Schedule estimates and consultations automatically",
+        "Answer questions about services, availability, and pricing",
+        "Follow up with job quotes and confirmations"
+    ],
+    "plumbing": [
+        "Take emergency calls 24/7 and route appropriately",
+        "Schedule service appointments automatically",
+        "Answer questions about services and pricing",
+        "Send appointment confirmations and technician ETAs"
+    ],
+    "hvac": [
+        "Capture service requests around the clock",
+        "Schedule maintenance and emergency calls",
+        "Answer questions about systems, pricing, and availability",
+        "Send automated reminders for seasonal maintenance"
+    ]
+}
+
+# Default benefits for businesses not in the map
+_DEFAULT_DEMO_BENEFITS = [
+    "Never miss a customer call, even after hours or when you're busy",
+    "Book appointments automatically and sync with your calendar",
+    "Answer common customer questions instantly",
+    "Reduce no-shows with automated reminders"
+]
+
+# The <li> lists above rendered once, not on every follow-up email
+_DEMO_BENEFITS_HTML = {business: "\n".join(f"<li>{benefit}</li>" for benefit in benefits) for business, benefits in _DEMO_BENEFITS.items()}
+_DEFAULT_DEMO_BENEFITS_HTML = "\n".join(f"<li>{benefit}</li>" for benefit in _DEFAULT_DEMO_BENEFITS)
+
 def send_demo_follow_up(customer_name, customer_email, business_type, appointment_datetime=None):
     """Send follow-up email after demo call"""
     subject = f"Great chatting with you, {customer_name}! - {COMPANY_NAME}"
 
-    # Business-specific benefits
-    business_benefits = {
-        "restaurant": [
-            "Take reservations 24/7, even when you're slammed during dinner rush",
-            "Answer common questions about hours, menu, and dietary restrictions",
-            "Reduce no-shows with automated SMS/email confirmations",
-            "Handle takeout orders and special requests"
-        ],
-        "salon": [
-            "Book appointments instantly while you're with clients",
-            "Send automated appointment reminders to reduce no-shows",
-            "Answer questions about services, pricing, and availability",
-            "Manage cancellations and rescheduling automatically"
-        ],
-        "medical": [
-            "Schedule patient appointments 24/7",
-            "Answer FAQs about office hours, insurance, and procedures",
-            "Send automated appointment reminders",
-            "Route urgent calls appropriately"
-        ],
-        "dental": [
-            "Book appointments while you're with patients",
-            "Answer questions about procedures, insurance, and costs",
-            "Send automated reminders to reduce no-shows",
-            "Handle emergency calls with proper routing"
-        ],
-        "spa": [
-            "Book treatments anytime, day or night",
-            "Answer questions about services, packages, and gift certificates",
-            "Send appointment confirmations and reminders",
-            "Upsell add-on services during booking"
-        ],
-        "contractor": [
-            "Capture every lead, even when you're on a job site",
-            "Schedule estimates and consultations automatically",
-            "Answer questions about services, availability, and pricing",
-            "Follow up with job quotes and confirmations"
-        ],
-        "plumbing": [
-            "Take emergency calls 24/7 and route appropriately",
-            "Schedule service appointments automatically",
-            "Answer questions about services and pricing",
-            "Send appointment confirmations and technician ETAs"
-        ],
-        "hvac": [
-            "Capture service requests around the clock",
-            "Schedule maintenance and emergency calls",
-            "Answer questions about systems, pricing, and availability",
-            "Send automated reminders for seasonal maintenance"
-        ]
-    }
-
-    # Default benefits for businesses not in the map
-    default_benefits = [
-        "Never miss a customer call, even after hours or when you're busy",
-        "Book appointments automatically and sync with your calendar",
-        "Answer common customer questions instantly",
-        "Reduce no-shows with automated reminders"
-    ]
-
     # Get business-specific benefits or use defaults
-    benefits = business_benefits.get(business_type.lower().strip(), default_benefits)
-    benefits_html = "\n".join([f"<li>{benefit}</li>" for benefit in benefits])
+    benefits_html = _DEMO_BENEFITS_HTML.get(business_type.lower().strip(), _DEFAULT_DEMO_BENEFITS_HTML)
 
     # Implementation call reminder with calendar link
     if appointment_datetime:
-        from datetime import datetime
-        import urllib.parse
         try:
             appt_dt = datetime.fromisoformat(appointment_datetime)
             formatted_date = appt_dt.strftime('%A, %B %d at %I:%M%p').replace(' 0', ' ')
 
             # Create Google Calendar add event URL (works for anyone)
-            from datetime import timedelta
             end_dt = appt_dt + timedelta(hours=1)
 
             # Format for Google Calendar URL: YYYYMMDDTHHmmSSZ
@@ -1048,68 +1356,49 @@ def send_demo_follow_up(customer_name, customer_email, business_type, appointmen
 
     return send_email(customer_email, subject, body_html)
 
+# Basic email validation regex
+# Supports standard emails like user@domain.com or user+tag@domain.co.uk
+# The local part is capped at 64 chars; neither character class allows '@', so there is exactly one
+_VALID_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]{1,64}@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})')
+
 def validate_email(email):
     """Validate email format"""
     if not email:
         return False
 
-    # Basic email validation regex
-    # Supports standard emails like user@domain.com or user+tag@domain.co.uk
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-
-    if not re.match(pattern, email):
-        return False
-
-    # Additional checks
-    if email.count('@') != 1:
-        return False
-
-    local, domain = email.split('@')
-
-    # Local part (before @) checks
-    if len(local) == 0 or len(local) > 64:
-        return False
-
-    # Domain part checks
-    if len(domain) == 0 or len(domain) > 255:
-        return False
-
-    # Domain must have at least one dot
-    if '.' not in domain:
-        return False
-
-    return True
+    match = _VALID_EMAIL_RE.fullmatch(email)
+
+    # Domain part (after @) is at most 255 chars
+    return match is not None and len(match.group(1)) <= 255
+
+# Number-word substitutions and other speech-to-text errors in email addresses
+_EMAIL_SPEECH_FIXES = {
+    # Number words
+    '4ward': 'forward',
+    '2': 'to',
+    '4': 'for',
+    '1': 'one',
+    '8': 'eight',
+    '0': 'o',  # "oh" vs zero context-dependent
+
+    # Common speech errors
+    'at': '@',  # In case "at" wasn't converted
+    ' at ': '@',
+    ' dot ': '.',
+    'dot com': '.com',
+    'dot net': '.net',
+    'dot org': '.org',
+    'dot io': '.io',
+
+    # Remove spaces
+    ' ': '',
+}
+# One alternation so the address is scanned once; longest first so '4ward' wins over '4'
+_EMAIL_SPEECH_FIX_RE = re.compile('|'.join(map(re.escape, sorted(_EMAIL_SPEECH_FIXES, key=len, reverse=True))))
 
 def normalize_email(email):
     """Fix common speech-to-text errors in email addresses"""
-    # Replace number-word substitutions that speech recognition makes
-    replacements = {
-        # Number words
-        '4ward': 'forward',
-        '2': 'to',
-        '4': 'for',
-        '1': 'one',
-        '8': 'eight',
-        '0': 'o',  # "oh" vs zero context-dependent
-
-        # Common speech errors
-        'at': '@',  # In case "at" wasn't converted
-        ' at ': '@',
-        ' dot ': '.',
-        'dot com': '.com',
-        'dot net': '.net',
-        'dot org': '.org',
-        'dot io': '.io',
-
-        # Remove spaces
-        ' ': '',
-    }
-
-    normalized = email.lower().strip()
-
-    # Apply replacements in order
-    for old, new in replacements.items():
-        normalized = normalized.replace(old, new)
+    normalized = _EMAIL_SPEECH_FIX_RE.sub(lambda m: _EMAIL_SPEECH_FIXES[m.group(0)], email.lower().strip())
 
     # Ensure there's exactly one @
     if '@' not in normalized and 'at' in email.lower():
@@ -1117,15 +1406,175 @@ def normalize_email(email):
 
     return normalized
 
-def extract_customer_info(text, session, is_user_speech=True):
-    """Extract customer information from user speech"""
-    # Only extract from user speech, not assistant responses
-    if not is_user_speech:
-        return
+# Spoken email patterns (e.g., "john at gmail dot com", "jane at company dot co dot uk")
+# Support common TLDs: .com, .net, .org, .io, .co, .ai, .us, .uk, .ca
+# Also support mixed formats: "tbone7777 at hotmail dot com" or "name123@domain dot com"
+# IMPORTANT: Include hyphens in character class to support emails like "t-bone7777@hotmail.com"
+# All formats are joined into one alternation so the text is scanned once. Each format is
+# wrapped in a named group (m.lastgroup tells us which one matched) and its inner groups
+# are prefixed with that name.
+_SPOKEN_TLDS = 'com|net|org|io|ai|us|uk|ca|gov|edu'  # TLDs accepted after a spoken "dot"
+_SPOKEN_EMAIL_PATTERNS = [
+    # Handle "t bone", "tbone", "tea bone" + numbers: "t bone 7777 at hotmail dot com"
+    ('bone', rf'(?P<bone_user>[a-z-]{{1,64}})\s+bone\s+(?P<bone_digits>\d{{1,20}})\s+at\s+(?P<bone_domain>[a-z0-9-]{{1,63}})\s+dot\s+(?P<bone_tld>{_SPOKEN_TLDS})'),
+    ('bone_joined', rf'(?P<bone_joined_user>[a-z-]{{1,64}})bone\s*(?P<bone_joined_digits>\d{{1,20}})\s+at\s+(?P<bone_joined_domain>[a-z0-9-]{{1,63}})\s+dot\s+(?P<bone_joined_tld>{_SPOKEN_TLDS})'),
+    # Standard: "tbone7777 at hotmail dot com" or "tbone 7777 at hotmail dot com"
+    ('digits', rf'(?P<digits_user>[a-z-]{{1,64}})\s*(?P<digits_digits>\d{{1,20}})\s+at\s+(?P<digits_domain>[a-z0-9-]{{1,63}})\s+dot\s+(?P<digits_tld>{_SPOKEN_TLDS})'),
+    # Standard spoken format with spaces: "name at domain dot com"
+    ('spoken', rf'(?P<spoken_user>[a-z0-9._-]{{1,64}})\s+at\s+(?P<spoken_domain>[a-z0-9-]{{1,63}})\s+dot\s+(?P<spoken_tld>{_SPOKEN_TLDS})'),
+    ('co_tld', r'(?P<co_tld_user>[a-z0-9._-]{1,64})\s+at\s+(?P<co_tld_domain>[a-z0-9-]{1,63})\s+dot\s+co\s+dot\s+(?P<co_tld_tld>uk|nz|za)'),  # .co.uk, .co.nz, etc.
+    ('co', r'(?P<co_user>[a-z0-9._-]{1,64})\s+at\s+(?P<co_domain>[a-z0-9-]{1,63})\s+dot\s+co'),  # .co
+    # Mixed format: "name@domain dot com" or "name at domain.com"
+    ('mixed_at', rf'(?P<mixed_at_user>[a-z0-9._-]{{1,64}})@(?P<mixed_at_domain>[a-z0-9-]{{1,63}})\s+dot\s+(?P<mixed_at_tld>{_SPOKEN_TLDS})'),
+    ('mixed_dot', rf'(?P<mixed_dot_user>[a-z0-9._-]{{1,64}})\s+at\s+(?P<mixed_dot_domain>[a-z0-9-]{{1,63}})\.(?P<mixed_dot_tld>{_SPOKEN_TLDS})'),
+]
+_SPOKEN_EMAIL_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in _SPOKEN_EMAIL_PATTERNS))
+
+_USERNAME_STRIP = str.maketrans('', '', ' -.')
+
+def _clean_spoken_username(username):
+    """Remove spaces, hyphens, dots from voice transcription"""
+    return username.translate(_USERNAME_STRIP)
+
+def _build_email_with_digits(match, branch):
+    """Separate name and digits: "tbone 7777 at hotmail dot com" """
+    username = _clean_spoken_username(f"{match[branch + '_user']}{match[branch + '_digits']}")
+    return f"{username}@{match[branch + '_domain']}.{match[branch + '_tld']}"
+
+def _build_email_with_tld(match, branch):
+    """Standard TLD: user@domain.tld"""
+    username = _clean_spoken_username(match[branch + '_user'])
+    return f"{username}@{match[branch + '_domain']}.{match[branch + '_tld']}"
+
+def _build_email_with_co_tld(match, branch):
+    """Two-part TLD: user@domain.co.uk"""
+    username = _clean_spoken_username(match[branch + '_user'])
+    return f"{username}@{match[branch + '_domain']}.co.{match[branch + '_tld']}"
+
+def _build_email_with_co(match, branch):
+    """.co domain: user@domain.co"""
+    username = _clean_spoken_username(match[branch + '_user'])
+    return f"{username}@{match[branch + '_domain']}.co"
+
+_SPOKEN_EMAIL_BUILDERS = {
+    'bone': _build_email_with_digits,
+    'bone_joined': _build_email_with_digits,
+    'digits': _build_email_with_digits,
+    'spoken': _build_email_with_tld,
+    'co_tld': _build_email_with_co_tld,
+    'co': _build_email_with_co,
+    'mixed_at': _build_email_with_tld,
+    'mixed_dot': _build_email_with_tld,
+}
+
+# Extract company name from patterns like:
+# "calling from Yoda Yoga"
+# "I'm from The Ink Shop"
+# "my barbershop's name is Cutz"
+# "it's called Cutz"
+# "The name of my nail salon is Nancy's Nails"
+# Prioritize business context patterns over person names
+# Each pattern is paired with literals it cannot match without, so most utterances skip the
+# regex engine entirely. The captures are bounded ({1,30}) to keep backtracking linear.
+_COMPANY_PATTERNS = tuple((hints, re.compile(pattern, re.IGNORECASE)) for hints, pattern in (
+    # High priority: explicit business name indicators
+    (('from',), r"from\s+([A-Z][A-Za-z0-9\s&']{2,30}?)(?:\.|,|!|\s+and\s|$)"),  # "calling from Yoda Yoga"
+    (('is',), r"(?:shop|salon|business|company|practice|office|firm|clinic|studio|center)(?:'s)?\s+(?:name\s+)?is\s+([A-Za-z0-9\s&']{2,30}?)(?:\.|,|\s+and\s|$)"),
+    (('called',), r"(?:it's|its)\s+called\s+([A-Za-z0-9\s&']{2,30}?)(?:\.|,|\s+and\s|$)"),
+    (('name',), r"name\s+(?:of\s+my\s+(?:nail\s+salon|tattoo\s+shop|shop|salon|business|company)\s+)?is\s+([A-Za-z0-9\s&']{2,30}?)(?:\.|,|\s+and\s|$)"),  # "name of my nail salon is Nancy's Nails"
+    (('for', 'help'), r"(?:for|help)\s+([A-Z][A-Za-z0-9\s&']{2,30}?)(?:\.|,|!|\s+and\s|$)"),  # "help The Ink Factory", "demo for ..."
+    # Lower priority: could be person name
+    (('@',), r"(?:^|\s)([A-Z][A-Za-z0-9\s&']{1,30}?)\s+and\s+[a-z0-9._%+-]+@"),  # "The Ink Shop and email@..." (might capture person name)
+))
+
+# Utterances that look like email fragments but carry no address parts
+_NOT_EMAIL_FRAGMENTS = frozenset({'my email', 'email', 'my email address', 'email address', 'is', 'yes', 'no'})
+
+# Business type keywords
+_BUSINESS_TYPE_KEYWORDS = (
+    'salon', 'shop', 'gym', 'restaurant', 'cafe', 'bakery', 'hotel', 'motel',
+    'spa', 'barbershop', 'pharmacy', 'clinic', 'hospital', 'practice',
+    'school', 'daycare', 'library', 'bookstore', 'boutique', 'store',
+    'bar', 'pub', 'nightclub', 'theater', 'theatre', 'museum', 'gallery',
+    'garage', 'dealership', 'workshop', 'factory', 'warehouse', 'studio',
+    'office', 'firm', 'agency', 'center', 'company', 'business',
+    'hvac', 'plumbing', 'electrical', 'contractor', 'roofing', 'landscaping',
+    'cleaning', 'painting', 'flooring', 'carpentry', 'handyman'
+)
+
+# Customer name patterns (case insensitive)
+_NAME_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:my name is|my name's|i'm|i am|this is|it's|speaking with)\s+([a-z]+(?:\s+[a-z]+)?)",  # "My name is Tony Vazquez"
+    r"^([a-z]+(?:\s+[a-z]+)?)(?:\.|,|!|\?|$)",  # Just "Tony" or "Tony Vazquez" as complete response
+))
+
+# Articles and common words that aren't adjectives ("a salon", "my shop", "run a gym")
+_ADJ_EXCLUDED = frozenset({'a', 'an', 'the', 'my', 'our', 'your', 'this', 'that', 'have', 'own', 'run'})
+
+# Common words that aren't names
+_NAME_EXCLUDED = frozenset({
+    'Sure', 'Yes', 'Yeah', 'Okay', 'Great', 'Perfect', 'Hello', 'Hi', 'Hey', 'Thanks', 'Thank', 'Ready', 'Ready To',
+    'Absolutely', 'Definitely', 'Yep', 'Yup', 'Nope', 'Nah'
+})
+
+# Common words and phrases that aren't company names (substring match) - one search for all of them
+_COMPANY_EXCLUDE_RE = re.compile('|'.join(re.escape(word) for word in (
+    'your', 'my', 'the', 'a', 'an', 'there', 'here', 'you', 'we', 'they', 'our', 'your demo', 'a demo', 'thrive', 'tony', 'mike', 'john', 'sarah',
+    'my email', 'my email address', 'email address', 'my phone', 'phone number', 'my number', 'that', 'this', 'it', 'something'
+)), re.IGNORECASE)
+
+# Don't store common phrases as company name fragments (compared with punctuation stripped)
+_COMMON_PHRASES = frozenset({
+    'the name of my', 'my business is', 'my shop is', 'yes', 'no',
+    'thank you', 'thanks', 'bye', 'goodbye', 'hello', 'hi', 'hey',
+    'okay', 'ok', 'sure', 'great', 'perfect', 'nice', 'wonderful',
+    'i see', 'got it', 'right', 'correct', 'exactly', 'almost',
+    'it is', 'its', "it's", 'that is', "that's", 'thats',
+    "i'm sorry", "im sorry", 'sorry', 'pardon', 'excuse me', 'what',
+    'huh', 'i would love to', 'i would', 'my email address'
+})
 
+# Email-related words (substring match) that disqualify a company name fragment - one scan for all of them
+_EMAIL_WORD_RE = re.compile('|'.join(re.escape(word) for word in (
+    'at', 'dot', 'com', 'net', 'org', 'hotmail', 'gmail', 'yahoo', 'outlook', 'email', 'mail', 'address', '@'
+)))
+
+_HAS_DIGIT = re.compile(r'\d').search  # Any digit - one C-level scan
+
+# One word (adjective) followed by any business keyword. Zero-width so overlapping pairs
+# ("nail salon shop") are all found in one scan
+_BUSINESS_ADJ_RE = re.compile(r'\b(?=([a-z]+)\s+(' + '|'.join(_BUSINESS_TYPE_KEYWORDS) + r')\b)')
+
+# Email typed/transcribed with "@". Quantifiers are bounded (RFC lengths) and the dot sits outside the
+# label class, so adjacent classes can't trade characters and long ASR text can't blow up backtracking
+_TYPED_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]{1,64}@(?:[A-Za-z0-9-]{1,63}\.){1,8}[A-Za-z]{2,63}\b')
+_EMAIL_FRAGMENT_SHAPE_RE = re.compile(r'^[a-z-]+\s*\d*\.?$')  # A name before numbers, like "t-bone" or "tbone 7777"
+_EMAIL_FRAGMENT_HINT_RE = re.compile(r'at|@|dot|\.com|hotmail|gmail')  # Email indicators (substring match)
+
+_PUNCT_DROP = str.maketrans('', '', '.,!?;:')  # Stripped before keyword/phrase comparisons
+# Name/company patterns see transcripts longer than _EXTRACTION_CHUNK_CHARS sentence by
+# sentence; anything past _EXTRACTION_MAX_CHARS is ignored
+_EXTRACTION_MAX_CHARS = 1024
+_EXTRACTION_CHUNK_CHARS = 256
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Fields extract_customer_info fills in
+_CUSTOMER_FIELDS = ('customer_name', 'customer_email', 'company_name', 'business_type')
+# Once every field is captured, only utterances with one of these cues are re-extracted. Besides
+# correction words this covers the email cues and every _COMPANY_PATTERNS phrasing ("from",
+# "<business noun> is", "called", "name", "for"/"help"), so company corrections still land.
+_CORRECTION_HINT_RE = re.compile(
+    r"\b(?:actually|sorry|correction|i meant|it's not|not|wrong|email|dot|company|called|from|name|for|help)\b|@"
+    r"|(?:shop|salon|business|company|practice|office|firm|clinic|studio|center)(?:'s)?\s+(?:name\s+)?is\b",
+    re.IGNORECASE)
+
+_ARTICLE_RE = re.compile(r'^(the|a|an)\s+', re.IGNORECASE)  # Leading article on combined fragments
+_TRAIL_RE = re.compile(r'\s+(is|are|and)\.?$', re.IGNORECASE)  # Trailing "is"/"are"/"and" on combined fragments
+
+def _extract_email(text, text_lower, session):
+    """Capture a typed or spoken email address (updates allowed, for corrections)"""
     # Extract email (handle spoken emails like "john at gmail dot com")
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    email_match = re.search(email_pattern, text)
+    email_match = _TYPED_EMAIL_RE.search(text)
     if email_match:
         raw_email = email_match.group(0)
         normalized_email = normalize_email(raw_email)
@@ -1144,51 +1593,30 @@ def extract_customer_info(text, session, is_user_speech=True):
         else:
             log(f"✗ EMAIL REJECTED (invalid format): {normalized_email}")
 
-    # Extract spoken email patterns (e.g., "john at gmail dot com", "jane at company dot co dot uk")
-    # Support common TLDs: .com, .net, .org, .io, .co, .ai, .us, .uk, .ca
-    # Also support mixed formats: "tbone7777 at hotmail dot com" or "name123@domain dot com"
-    # IMPORTANT: Include hyphens in character class to support emails like "t-bone7777@hotmail.com"
-    spoken_patterns = [
-        # Handle "t bone", "tbone", "tea bone" + numbers: "t bone 7777 at hotmail dot com"
-        r'([a-z-]+)\s+bone\s+(\d+)\s+at\s+([a-z0-9-]+)\s+dot\s+(com|net|org|io|ai|us|uk|ca|gov|edu)',
-        r'([a-z-]+)bone\s*(\d+)\s+at\s+([a-z0-9-]+)\s+dot\s+(com|net|org|io|ai|us|uk|ca|gov|edu)',
-        # Standard: "tbone7777 at hotmail dot com" or "tbone 7777 at hotmail dot com"
-        r'([a-z-]+)\s*(\d+)\s+at\s+([a-z0-9-]+)\s+dot\s+(com|net|org|io|ai|us|uk|ca|gov|edu)',
-        # Standard spoken format with spaces: "name at domain dot com"
-        r'([a-z0-9\._-]+)\s+at\s+([a-z0-9-]+)\s+dot\s+(com|net|org|io|ai|us|uk|ca|gov|edu)',
-        r'([a-z0-9\._-]+)\s+at\s+([a-z0-9-]+)\s+dot\s+co\s+dot\s+(uk|nz|za)',  # .co.uk, .co.nz, etc.
-        r'([a-z0-9\._-]+)\s+at\s+([a-z0-9-]+)\s+dot\s+co',  # .co
-        # Mixed format: "name@domain dot com" or "name at domain.com"
-        r'([a-z0-9\._-]+)@([a-z0-9-]+)\s+dot\s+(com|net|org|io|ai|us|uk|ca|gov|edu)',
-        r'([a-z0-9\._-]+)\s+at\s+([a-z0-9-]+)\.(com|net|org|io|ai|us|uk|ca|gov|edu)',
-    ]
-
     # Log the text we're searching for debugging
-    log(f"[EMAIL DEBUG] Searching text: {text.lower()[:200]}")
+    log(f"[EMAIL DEBUG] Searching text: {text_lower[:200]}")
 
     # Accumulate email fragments across utterances
     # If user says "T-bone" then "7777 at hotmail dot com" separately, we need to combine them
     if 'email_fragments' not in session:
-        session['email_fragments'] = []
+        session['email_fragments'] = deque(maxlen=3)  # Keep only last 3 fragments
 
     # Check if this looks like an email fragment
-    text_lower = text.lower().strip()
+    fragment = text_lower.strip()
     is_email_fragment = (
         # Contains email indicators
-        ('at' in text_lower or '@' in text_lower or 'dot' in text_lower or '.com' in text_lower or 'hotmail' in text_lower or 'gmail' in text_lower) or
-        # Or looks like a name before numbers (like "t-bone")
-        (re.match(r'^[a-z-]+\s*\d*\.?$', text_lower) and len(text_lower.split()) <= 2)
+        _EMAIL_FRAGMENT_HINT_RE.search(fragment) is not None or
+        # Or looks like a name before numbers (like "t-bone") - the shape allows at most two words
+        _EMAIL_FRAGMENT_SHAPE_RE.match(fragment) is not None
     )
 
     # Store potential email fragments
-    if is_email_fragment and text_lower not in ['my email', 'email', 'my email address', 'email address', 'is', 'yes', 'no']:
-        session['email_fragments'].append(text_lower)
-        # Keep only last 3 fragments
-        session['email_fragments'] = session['email_fragments'][-3:]
-        log(f"[EMAIL DEBUG] Stored email fragment: {text_lower}")
+    if is_email_fragment and fragment not in _NOT_EMAIL_FRAGMENTS:
+        session['email_fragments'].append(fragment)
+        log(f"[EMAIL DEBUG] Stored email fragment: {fragment}")
 
     # Try to match with current text first
-    combined_text = text.lower()
+    combined_text = text_lower
 
     # If no match, try with accumulated fragments
     if len(session.get('email_fragments', [])) >= 2:
@@ -1196,141 +1624,96 @@ def extract_customer_info(text, session, is_user_speech=True):
         log(f"[EMAIL DEBUG] Trying combined fragments: {combined_text}")
 
     # ALWAYS check for spoken email - allow updates/corrections
-    for i, pattern in enumerate(spoken_patterns):
-        spoken_email = re.search(pattern, combined_text)
-        if spoken_email:
-            groups = spoken_email.groups()
-            log(f"[EMAIL DEBUG] Pattern {i} matched! Groups: {groups}")
-            if len(groups) == 4:
-                # Pattern with separate name and digits: "tbone 7777 at hotmail dot com"
-                # Clean up username: remove spaces, hyphens, dots from voice transcription
-                username = f"{groups[0]}{groups[1]}".replace(" ", "").replace("-", "").replace(".", "")
-                email = f"{username}@{groups[2]}.{groups[3]}"
-            elif len(groups) == 3 and 'co dot' not in pattern:
-                # Standard TLD: user@domain.tld
-                # Clean up username: remove spaces, hyphens, dots from voice transcription
-                username = groups[0].replace(" ", "").replace("-", "").replace(".", "")
-                email = f"{username}@{groups[1]}.{groups[2]}"
-            elif len(groups) == 3 and 'dot co dot' in pattern:
-                # Two-part TLD: user@domain.co.uk
-                username = groups[0].replace(" ", "").replace("-", "").replace(".", "")
-                email = f"{username}@{groups[1]}.co.{groups[2]}"
-            elif len(groups) == 2:
-                # .co domain: user@domain.co
-                username = groups[0].replace(" ", "").replace("-", "").replace(".", "")
-                email = f"{username}@{groups[1]}.co"
-            else:
-                continue
-
-            # Validate before storing
-            if validate_email(email):
-                old_email = session.get('customer_email')
-                session['customer_email'] = email
-                # Clear email fragments after successful capture
-                if 'email_fragments' in session:
-                    del session['email_fragments']
-                if old_email and old_email != email:
-                    log(f"Updated spoken email: {old_email} -> {email}")
-                else:
-                    log(f"Captured spoken email: {email}")
-                break
+    # One pass over the text; the matched branch picks how the address is assembled
+    for spoken_email in _SPOKEN_EMAIL_RE.finditer(combined_text):
+        branch = spoken_email.lastgroup
+        log(f"[EMAIL DEBUG] Pattern {branch} matched: {spoken_email.group(branch)}")
+        email = _SPOKEN_EMAIL_BUILDERS[branch](spoken_email, branch)
+
+        # Validate before storing
+        if validate_email(email):
+            old_email = session.get('customer_email')
+            session['customer_email'] = email
+            # Clear email fragments after successful capture
+            if 'email_fragments' in session:
+                del session['email_fragments']
+            if old_email and old_email != email:
+                log(f"Updated spoken email: {old_email} -> {email}")
             else:
-                log(f"Invalid spoken email rejected: {email}")
+                log(f"Captured spoken email: {email}")
+            break
+        else:
+            log(f"Invalid spoken email rejected: {email}")
 
+def _extract_business_type(text_lower, session):
+    """Capture the caller's business type ("dental office", "gym")"""
     # Extract business type dynamically from patterns in user speech
     # Captures full phrases like "dental office", "nail salon", "tattoo shop", or standalone "gym", "restaurant"
+    # Priority 1: Look for multi-word business phrases (e.g., "dental office", "nail salon", "tattoo shop")
+    # Match: [adjective] [keyword], capturing both words
+    # First adjective seen before each keyword; keywords are then tried in priority order
+    adjectives = {}
+    for match in _BUSINESS_ADJ_RE.finditer(text_lower):
+        adjectives.setdefault(match.group(2), match.group(1))
+    for keyword in _BUSINESS_TYPE_KEYWORDS:
+        adjective = adjectives.get(keyword)
+        if adjective:
+            # Filter out articles and common words that aren't adjectives
+            if adjective not in _ADJ_EXCLUDED:
+                business_type = f"{adjective} {keyword}"
+                session['business_type'] = business_type.title()
+                log(f"Captured business type: {session['business_type']}")
+                break
+
+    # Priority 2: Look for standalone business type keywords (e.g., just "gym", "restaurant")
     if not session.get('business_type'):
-        text_lower = text.lower()
-
-        # Business type keywords
-        business_type_keywords = [
-            'salon', 'shop', 'gym', 'restaurant', 'cafe', 'bakery', 'hotel', 'motel',
-            'spa', 'barbershop', 'pharmacy', 'clinic', 'hospital', 'practice',
-            'school', 'daycare', 'library', 'bookstore', 'boutique', 'store',
-            'bar', 'pub', 'nightclub', 'theater', 'theatre', 'museum', 'gallery',
-            'garage', 'dealership', 'workshop', 'factory', 'warehouse', 'studio',
-            'office', 'firm', 'agency', 'center', 'company', 'business',
-            'hvac', 'plumbing', 'electrical', 'contractor', 'roofing', 'landscaping',
-            'cleaning', 'painting', 'flooring', 'carpentry', 'handyman'
-        ]
-
-        # Priority 1: Look for multi-word business phrases (e.g., "dental office", "nail salon", "tattoo shop")
-        # Match: [adjective] [keyword], capturing both words
-        for keyword in business_type_keywords:
-            # Pattern: one word (adjective) followed by the keyword
-            pattern = rf'\b([a-z]+)\s+{keyword}\b'
-            match = re.search(pattern, text_lower)
-            if match:
-                adjective = match.group(1)
-                # Filter out articles and common words that aren't adjectives
-                excluded_words = ['a', 'an', 'the', 'my', 'our', 'your', 'this', 'that', 'have', 'own', 'run']
-                if adjective not in excluded_words:
-                    business_type = f"{adjective} {keyword}"
-                    session['business_type'] = business_type.title()
-                    log(f"Captured business type: {session['business_type']}")
-                    break
-
-        # Priority 2: Look for standalone business type keywords (e.g., just "gym", "restaurant")
-        if not session.get('business_type'):
-            # Remove punctuation for cleaner matching
-            text_cleaned = re.sub(r'[.,!?;:]', '', text_lower)
-            text_words = text_cleaned.split()
-
-            for keyword in business_type_keywords:
-                if keyword in text_words:
-                    session['business_type'] = keyword.title()
-                    log(f"Captured business type: {session['business_type']}")
-                    break
+        # Remove punctuation for cleaner matching
+        text_cleaned = text_lower.translate(_PUNCT_DROP)
+        text_words = set(text_cleaned.split())
+
+        for keyword in _BUSINESS_TYPE_KEYWORDS:
+            if keyword in text_words:
+                session['business_type'] = keyword.title()
+                log(f"Captured business type: {session['business_type']}")
+                break
+
+def _search_chunks(pattern, chunks):
+    """First match of pattern in the transcript chunks, or None"""
+    for chunk in chunks:
+        match = pattern.search(chunk)
+        if match:
+            return match
+    return None
 
+def _extract_name(chunks, session):
+    """Capture the caller's name"""
     # Extract customer name from patterns like:
     # "Tony", "Tony Vazquez", "My name is Tony", "This is Tony", "I'm Tony"
-    if not session.get('customer_name'):
-        name_patterns = [
-            r"(?:my name is|my name's|i'm|i am|this is|it's|speaking with)\s+([a-z]+(?:\s+[a-z]+)?)",  # "My name is Tony Vazquez" (case insensitive)
-            r"^([a-z]+(?:\s+[a-z]+)?)(?:\.|,|!|\?|$)",  # Just "Tony" or "Tony Vazquez" as complete response
-        ]
-
-        for pattern in name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                customer_name = match.group(1).strip().title()  # Capitalize properly
-                # Filter out common words that aren't names
-                excluded = ['Sure', 'Yes', 'Yeah', 'Okay', 'Great', 'Perfect', 'Hello', 'Hi', 'Hey', 'Thanks', 'Thank', 'Ready', 'Ready To', 'Absolutely', 'Definitely', 'Yep', 'Yup', 'Nope', 'Nah']
-                if customer_name not in excluded and len(customer_name) >= 2:
-                    session['customer_name'] = customer_name
-                    log(f"Captured customer name: {customer_name}")
-                    break
-                else:
-                    log(f"Rejected name candidate: '{customer_name}' (in exclusion list or too short)")
-
-    # Extract company name from patterns like:
-    # "calling from Yoda Yoga"
-    # "I'm from The Ink Shop"
-    # "my barbershop's name is Cutz"
-    # "it's called Cutz"
-    # "The name of my nail salon is Nancy's Nails"
-    # Prioritize business context patterns over person names
-    company_patterns = [
-        # High priority: explicit business name indicators
-        r"(?:calling from|from)\s+([A-Z][A-Za-z0-9\s&']{2,30}?)(?:\.|,|!|\s+and\s|$)",  # "calling from Yoda Yoga"
-        r"(?:shop|salon|business|company|practice|office|firm|clinic|studio|center)(?:'s)?\s+(?:name\s+)?is\s+([A-Za-z0-9\s&']{2,30}?)(?:\.|,|\s+and\s|$)",
-        r"(?:it's|its)\s+called\s+([A-Za-z0-9\s&']{2,30}?)(?:\.|,|\s+and\s|$)",
-        r"(?:the\s+)?name\s+(?:of\s+my\s+(?:nail\s+salon|tattoo\s+shop|shop|salon|business|company)\s+)?is\s+([A-Za-z0-9\s&']{2,30}?)(?:\.|,|\s+and\s|$)",  # "name of my nail salon is Nancy's Nails"
-        r"(?:demo\s+for|set\s+up\s+for|help|for)\s+([A-Z][A-Za-z0-9\s&']{2,30}?)(?:\.|,|!|\s+and\s|$)",  # "help The Ink Factory"
-        # Lower priority: could be person name
-        r"(?:^|\s)([A-Z][A-Za-z0-9\s&']{1,30}?)\s+and\s+[a-z0-9._%+-]+@",  # "The Ink Shop and email@..." (might capture person name)
-    ]
-
-    # ALWAYS check for company name - allow updates
-    for pattern in company_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _NAME_PATTERNS:
+        # The bare-name pattern is anchored to the start of the utterance, not of every sentence
+        match = _search_chunks(pattern, chunks[:1] if pattern.pattern.startswith('^') else chunks)
+        if match:
+            customer_name = match.group(1).strip().title()  # Capitalize properly
+            # Filter out common words that aren't names
+            if customer_name not in _NAME_EXCLUDED and len(customer_name) >= 2:
+                session['customer_name'] = customer_name
+                log(f"Captured customer name: {customer_name}")
+                break
+            else:
+                log(f"Rejected name candidate: '{customer_name}' (in exclusion list or too short)")
+
+def _extract_company(text, text_lower, session, chunks):
+    """Capture the company name (updates allowed), falling back to fragments across turns"""
+    # Extract company name (see _COMPANY_PATTERNS)
+    # Checked every turn - allow updates
+    for hints, pattern in _COMPANY_PATTERNS:
+        if not any(hint in text_lower for hint in hints):
+            continue
+        match = _search_chunks(pattern, chunks)
         if match:
             company_name = match.group(1).strip()
-            # Filter out common words and phrases that aren't company names
-            excluded = ['your', 'my', 'the', 'a', 'an', 'there', 'here', 'you', 'we', 'they', 'our', 'your demo', 'a demo', 'thrive', 'tony', 'mike', 'john', 'sarah',
-                       'my email', 'my email address', 'email address', 'my phone', 'phone number', 'my number', 'that', 'this', 'it', 'something']
             # Check if company name contains common excluded patterns
-            is_excluded = any(excl in company_name.lower() for excl in excluded)
+            is_excluded = _COMPANY_EXCLUDE_RE.search(company_name) is not None
             if not is_excluded and len(company_name) > 1:
                 old_name = session.get('company_name')
                 session['company_name'] = company_name
@@ -1345,44 +1728,57 @@ def extract_customer_info(text, session, is_user_speech=True):
     if not session.get('company_name'):
         # Check if this looks like a company name fragment (capitalized words)
         if text.strip() and text[0].isupper() and len(text.strip().split()) <= 3:
-            # Store fragments in a list
+            # Store the last 3 fragments
             if 'company_name_fragments' not in session:
-                session['company_name_fragments'] = []
+                session['company_name_fragments'] = deque(maxlen=3)
 
             # Don't store common phrases (strip punctuation for comparison)
-            text_normalized = re.sub(r'[.,!?;:]', '', text.strip()).lower()
-            common_phrases = [
-                'the name of my', 'my business is', 'my shop is', 'yes', 'no',
-                'thank you', 'thanks', 'bye', 'goodbye', 'hello', 'hi', 'hey',
-                'okay', 'ok', 'sure', 'great', 'perfect', 'nice', 'wonderful',
-                'i see', 'got it', 'right', 'correct', 'exactly', 'almost',
-                'it is', 'its', "it's", 'that is', "that's", 'thats',
-                "i'm sorry", "im sorry", 'sorry', 'pardon', 'excuse me', 'what',
-                'huh', 'i would love to', 'i would', 'my email address'
-            ]
+            text_normalized = text.strip().translate(_PUNCT_DROP).lower()
 
             # Don't store email-related words
-            email_words = ['at', 'dot', 'com', 'net', 'org', 'hotmail', 'gmail', 'yahoo', 'outlook',
-                          'email', 'mail', 'address', '@']
-            has_email_word = any(word in text_normalized for word in email_words)
+            has_email_word = _EMAIL_WORD_RE.search(text_normalized) is not None
 
             # Don't store if it contains numbers and @ or "at" (likely email)
-            looks_like_email = '@' in text or ('at' in text_normalized and any(char.isdigit() for char in text))
+            looks_like_email = '@' in text or ('at' in text_normalized and _HAS_DIGIT(text) is not None)
 
-            if text_normalized not in common_phrases and not has_email_word and not looks_like_email:
+            if text_normalized not in _COMMON_PHRASES and not has_email_word and not looks_like_email:
                 session['company_name_fragments'].append(text.strip())
 
                 # If we have 2-3 fragments, try to combine them
                 if len(session['company_name_fragments']) >= 2:
-                    combined = ' '.join(session['company_name_fragments'][-3:])  # Last 3 fragments
+                    combined = ' '.join(session['company_name_fragments'])
                     # Remove trailing/leading articles
-                    combined = re.sub(r'^(the|a|an)\s+', '', combined, flags=re.IGNORECASE)
-                    combined = re.sub(r'\s+(is|are|and)\.?$', '', combined, flags=re.IGNORECASE)
+                    combined = _ARTICLE_RE.sub('', combined)
+                    combined = _TRAIL_RE.sub('', combined)
                     if len(combined) > 3:
                         session['company_name'] = combined.title()
                         log(f"Captured company name from fragments: {session['company_name']}")
                         del session['company_name_fragments']
 
+def extract_customer_info(text, session, is_user_speech=True):
+    """Extract customer information from user speech"""
+    # Only extract from user speech, not assistant responses
+    if not is_user_speech:
+        return
+
+    # Bound the regex work on long run-on transcripts: hard cap, then the lazy name/company
+    # patterns run sentence by sentence
+    text = text[:_EXTRACTION_MAX_CHARS]
+
+    # Every field captured - skip the regex work unless the caller is correcting something
+    if all(session.get(field) for field in _CUSTOMER_FIELDS) and not _CORRECTION_HINT_RE.search(text):
+        return
+
+    chunks = _SENTENCE_SPLIT_RE.split(text) if len(text) > _EXTRACTION_CHUNK_CHARS else (text,)
+
+    text_lower = text.lower()  # Lowercased once, shared by the extractors below
+    _extract_email(text, text_lower, session)
+    if not session.get('business_type'):
+        _extract_business_type(text_lower, session)
+    if not session.get('customer_name'):
+        _extract_name(chunks, session)
+    _extract_company(text, text_lower, session, chunks)
+
 # ======================== Google Calendar Functions ========================
 def generate_business_name(business_type: str) -> str:
     """Generate ACME business name based on type"""
@@ -1395,6 +1791,149 @@ def generate_business_name(business_type: str) -> str:
     # Generate ACME name
     return f"ACME {business_type}"
 
+_PACIFIC = pytz.timezone('America/Los_Angeles')
+_CALENDAR_SCOPES = ['https://www.googleapis.com/auth/calendar']
+_BASE64_WHITESPACE = str.maketrans('', '', ' \r\n')
+_HOUR_DISPLAY = {hour: f"{(hour - 1) % 12 + 1}{'am' if hour < 12 else 'pm'}" for hour in range(24)}  # 9 -> "9am", 13 -> "1pm"
+
+@lru_cache(maxsize=1)
+def _get_calendar_service():
+    """Load service account credentials and build the Calendar client once per process
+
+    Supports base64 env var (Railway - recommended), raw JSON env var, or a local file.
+    Returns None when no credentials are configured or they are malformed.
+    """
+    import httplib2
+    from google.oauth2 import service_account
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build
+
+    google_creds_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
+    google_creds_base64 = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON_BASE64")
+
+    if google_creds_base64:
+        source = "base64 environment variable"
+    elif google_creds_json:
+        source = "environment variable"
+    elif os.path.exists(GOOGLE_CALENDAR_SERVICE_ACCOUNT):
+        source = f"file: {GOOGLE_CALENDAR_SERVICE_ACCOUNT}"
+    else:
+        log(f"[CALENDAR] ✗ No Google Calendar credentials found!")
+        log(f"[CALENDAR] Checked env var: GOOGLE_SERVICE_ACCOUNT_JSON_BASE64 = {bool(google_creds_base64)}")
+        log(f"[CALENDAR] Checked env var: GOOGLE_SERVICE_ACCOUNT_JSON = {bool(google_creds_json)}")
+        log(f"[CALENDAR] Checked file: {GOOGLE_CALENDAR_SERVICE_ACCOUNT} exists = False")
+        return None
+
+    try:
+        if google_creds_base64:
+            # Clean base64 - remove any whitespace
+            google_creds_base64 = google_creds_base64.strip().translate(_BASE64_WHITESPACE)
+            credentials_info = json.loads(base64.b64decode(google_creds_base64).decode('utf-8'))
+        elif google_creds_json:
+            credentials_info = json.loads(google_creds_json)
+        else:
+            credentials_info = None
+
+        if credentials_info is None:
+            credentials = service_account.Credentials.from_service_account_file(
+                GOOGLE_CALENDAR_SERVICE_ACCOUNT,
+                scopes=_CALENDAR_SCOPES
+            )
+        else:
+            # Fix private key newlines if they got corrupted
+            pk = credentials_info.get('private_key', '')
+            if '\\n' in pk and '\n' not in pk:
+                log("[CALENDAR] Fixing escaped newlines in private key")
+                credentials_info['private_key'] = pk.replace('\\n', '\n')
+            credentials = service_account.Credentials.from_service_account_info(
+                credentials_info,
+                scopes=_CALENDAR_SCOPES
+            )
+    except (ValueError, KeyError) as e:
+        # Malformed credentials (bad base64/JSON, missing fields, unreadable key) - a config problem,
+        # not a bug, so no traceback; the None is cached so it isn't re-parsed on every lookup
+        log(f"[CALENDAR] ✗ Invalid Google Calendar credentials from {source}: {type(e).__name__}: {e}")
+        return None
+
+    log(f"[CALENDAR] ✓ Loaded Google Calendar credentials from {source}")
+    # One authorized keep-alive connection (with a timeout - httplib2 has none by default) shared by
+    # every request; bundled discovery document, so no discovery round-trip when the service is built
+    http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=GOOGLE_CALENDAR_TIMEOUT))
+    return build('calendar', 'v3', http=http, cache_discovery=False, static_discovery=True)
+
+def _execute_calendar_request(service, make_request):
+    """Execute make_request(service), retrying rate limits/5xx with backoff
+
+    If Google rejects the credentials, the cached service is rebuilt and the request retried once.
+    """
+    try:
+        with CALENDAR_HTTP_LOCK:
+            return make_request(service).execute(num_retries=GOOGLE_CALENDAR_RETRIES)
+    except Exception as e:
+        from google.auth.exceptions import RefreshError
+        from googleapiclient.errors import HttpError
+        if not (isinstance(e, RefreshError) or (isinstance(e, HttpError) and e.resp.status == 401)):
+            raise
+        log(f"[CALENDAR] Credentials rejected ({type(e).__name__}) - rebuilding Google Calendar service")
+        _get_calendar_service.cache_clear()
+        service = _get_calendar_service()
+        if service is None:
+            raise
+        with CALENDAR_HTTP_LOCK:
+            return make_request(service).execute(num_retries=GOOGLE_CALENDAR_RETRIES)
+
+def _list_calendar_events(service, time_min, time_max):
+    """List events between time_min and time_max, reusing results for CALENDAR_EVENTS_CACHE_TTL seconds
+
+    The key buckets both bounds to the minute, so re-queries during the same call hit the cache.
+    """
+    key = (GOOGLE_CALENDAR_EMAIL, int(time_min.timestamp()) // 60, int(time_max.timestamp()) // 60)
+    with CALENDAR_EVENTS_LOCK:
+        events = CALENDAR_EVENTS_CACHE.get(key)
+        if events is not None:
+            log(f"[CALENDAR DEBUG] Events cache hit ({len(events)} events)")
+            return events
+        events_result = _execute_calendar_request(service, lambda service: service.events().list(
+            calendarId=GOOGLE_CALENDAR_EMAIL,
+            timeMin=time_min.isoformat(),
+            timeMax=time_max.isoformat(),
+            singleEvents=True,
+            orderBy='startTime',
+            # Only what the slot search and its debug log read - skips descriptions, attendees, etc.
+            fields='items(summary,start/dateTime,end/dateTime)'
+        ))
+        events = events_result.get('items', [])
+        CALENDAR_EVENTS_CACHE[key] = events
+        return events
+
+def _parse_event_time(value):
+    """Google event dateTime (RFC 3339, "Z" or offset) -> aware datetime"""
+    if parse_rfc3339 is not None:
+        return parse_rfc3339(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _busy_intervals(events):
+    """Parse timed events once into sorted, merged (start, end) busy intervals
+
+    All-day events (no dateTime) are ignored, same as the slot search always did.
+    """
+    intervals = []
+    for event in events:
+        event_start = event.get('start', {}).get('dateTime', '')
+        event_end = event.get('end', {}).get('dateTime', '')
+        if event_start and event_end:
+            intervals.append((_parse_event_time(event_start), _parse_event_time(event_end)))
+    intervals.sort()
+
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
 def get_available_calendar_slots(days_ahead: int = 14, num_slots: int = 1) -> list:
     """Get first available appointment slot from Google Calendar
 
@@ -1429,108 +1968,25 @@ def get_available_calendar_slots(days_ahead: int = 14, num_slots: int = 1) -> li
         return mock_slots
 
     try:
-        log("[CALENDAR] Attempting to load Google Calendar credentials...")
-        # Load service account credentials
-        google_creds_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-        google_creds_base64 = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON_BASE64")
-
-        if google_creds_base64:
-            import json
-            import base64
-            log("[CALENDAR] Found GOOGLE_SERVICE_ACCOUNT_JSON_BASE64 env var")
-            log(f"[CALENDAR] Base64 length: {len(google_creds_base64)} chars")
-            # Clean base64 - remove any whitespace
-            google_creds_base64 = google_creds_base64.strip().replace('\n', '').replace('\r', '').replace(' ', '')
-            log(f"[CALENDAR] Cleaned base64 length: {len(google_creds_base64)} chars")
-            # Decode from base64
-            decoded = base64.b64decode(google_creds_base64).decode('utf-8')
-            credentials_info = json.loads(decoded)
-            credentials = service_account.Credentials.from_service_account_info(
-                credentials_info,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            log("[CALENDAR] ✓ Loaded Google Calendar credentials from base64 environment variable")
-        elif google_creds_json:
-            import json
-            log("[CALENDAR] Found GOOGLE_SERVICE_ACCOUNT_JSON env var")
-            log(f"[CALENDAR] JSON length: {len(google_creds_json)} chars")
-
-            # Parse JSON
-            credentials_info = json.loads(google_creds_json)
-
-            # Debug private key format
-            if 'private_key' in credentials_info:
-                pk = credentials_info['private_key']
-                log(f"[CALENDAR] Private key length: {len(pk)} chars")
-                log(f"[CALENDAR] Private key starts with: {pk[:50]}")
-                log(f"[CALENDAR] Has actual newlines: {chr(10) in pk}")
-                has_backslash_n = '\\n' in pk
-                log(f"[CALENDAR] Has backslash-n: {has_backslash_n}")
-
-                # Count lines - should be ~28 lines for a proper RSA key
-                lines = pk.split('\n')
-                log(f"[CALENDAR] Private key has {len(lines)} lines")
-
-                # If it's all on one line, the newlines are wrong
-                if len(lines) == 1:
-                    log("[CALENDAR] ERROR: Private key is all on one line - newlines are broken")
-
-            try:
-                credentials = service_account.Credentials.from_service_account_info(
-                    credentials_info,
-                    scopes=['https://www.googleapis.com/auth/calendar']
-                )
-                log("[CALENDAR] ✓ Loaded Google Calendar credentials from environment variable")
-            except Exception as e:
-                log(f"[CALENDAR] ✗ Failed to create credentials: {type(e).__name__}: {str(e)}")
-                import traceback
-                log(f"[CALENDAR] Full traceback: {traceback.format_exc()}")
-                raise
-        elif os.path.exists(GOOGLE_CALENDAR_SERVICE_ACCOUNT):
-            log(f"[CALENDAR] Found credentials file at: {GOOGLE_CALENDAR_SERVICE_ACCOUNT}")
-            credentials = service_account.Credentials.from_service_account_file(
-                GOOGLE_CALENDAR_SERVICE_ACCOUNT,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            log("[CALENDAR] ✓ Loaded Google Calendar credentials from file")
-        else:
-            log(f"[CALENDAR] ✗ No Google Calendar credentials found!")
-            log(f"[CALENDAR] Checked env var: GOOGLE_SERVICE_ACCOUNT_JSON_BASE64 = {bool(google_creds_base64)}")
-            log(f"[CALENDAR] Checked env var: GOOGLE_SERVICE_ACCOUNT_JSON = {bool(google_creds_json)}")
-            log(f"[CALENDAR] Checked file: {GOOGLE_CALENDAR_SERVICE_ACCOUNT} exists = False")
+        service = _get_calendar_service()
+        if service is None:
             return []
 
-        log("[CALENDAR] Building Google Calendar service...")
-        service = build('calendar', 'v3', credentials=credentials)
-        log("[CALENDAR] ✓ Google Calendar service built successfully")
-
         # Get events for next N days - use Pacific time
-        import pytz
-        pacific = pytz.timezone('America/Los_Angeles')
-        now = datetime.now(pacific)
-        time_min = now.isoformat()
-        time_max = (now + timedelta(days=days_ahead)).isoformat()
+        now = datetime.now(_PACIFIC)
 
-        log(f"[CALENDAR] Fetching events from {GOOGLE_CALENDAR_EMAIL}")
-        log(f"[CALENDAR] Time range (Pacific): {now.strftime('%Y-%m-%d %H:%M %Z')} to {(now + timedelta(days=days_ahead)).strftime('%Y-%m-%d %H:%M %Z')}")
-
-        events_result = service.events().list(
-            calendarId=GOOGLE_CALENDAR_EMAIL,
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+        log(f"[CALENDAR DEBUG] Fetching events from {GOOGLE_CALENDAR_EMAIL}")
+        log(f"[CALENDAR DEBUG] Time range (Pacific): {now.strftime('%Y-%m-%d %H:%M %Z')} to {(now + timedelta(days=days_ahead)).strftime('%Y-%m-%d %H:%M %Z')}")
 
-        existing_events = events_result.get('items', [])
+        existing_events = _list_calendar_events(service, now, now + timedelta(days=days_ahead))
         log(f"[CALENDAR] ✓ Found {len(existing_events)} existing events in next {days_ahead} days")
 
         # Log first few events for debugging
-        if existing_events:
+        if existing_events and _DEBUG_LOGGING:
             for i, event in enumerate(existing_events[:3]):
                 event_start = event.get('start', {}).get('dateTime', 'N/A')
                 event_summary = event.get('summary', 'Untitled')
-                log(f"[CALENDAR]   Event {i+1}: {event_summary} at {event_start}")
+                log(f"[CALENDAR DEBUG]   Event {i+1}: {event_summary} at {event_start}")
 
         # Operating hours: 9am - 7pm (last appointment at 6pm)
         OPEN_HOUR = 9
@@ -1544,72 +2000,64 @@ def get_available_calendar_slots(days_ahead: int = 14, num_slots: int = 1) -> li
         if one_hour_later.minute > 0:
             next_slot_time += timedelta(hours=1)
 
-        log(f"[CALENDAR] Current time: {now.strftime('%Y-%m-%d %H:%M')}")
-        log(f"[CALENDAR] First possible slot: {next_slot_time.strftime('%Y-%m-%d %H:%M')}")
+        log(f"[CALENDAR DEBUG] Current time: {now.strftime('%Y-%m-%d %H:%M')}")
+        log(f"[CALENDAR DEBUG] First possible slot: {next_slot_time.strftime('%Y-%m-%d %H:%M')}")
 
         # Check if next slot is after hours - if so, start from next day at 9am
         if next_slot_time.hour >= CLOSE_HOUR or next_slot_time.hour < OPEN_HOUR:
             # Move to next day at 9am
             next_slot_time = (next_slot_time + timedelta(days=1)).replace(hour=OPEN_HOUR, minute=0, second=0, microsecond=0)
-            log(f"[CALENDAR] After hours, moving to next day at 9am: {next_slot_time.strftime('%Y-%m-%d %H:%M')}")
+            log(f"[CALENDAR DEBUG] After hours, moving to next day at 9am: {next_slot_time.strftime('%Y-%m-%d %H:%M')}")
 
         # Search for first available slot
         max_search_date = now + timedelta(days=days_ahead)
         current_check = next_slot_time
         slots_checked = 0
 
-        log(f"[CALENDAR] Starting search from {current_check.strftime('%Y-%m-%d %H:%M')} to {max_search_date.strftime('%Y-%m-%d %H:%M')}")
+        log(f"[CALENDAR DEBUG] Starting search from {current_check.strftime('%Y-%m-%d %H:%M')} to {max_search_date.strftime('%Y-%m-%d %H:%M')}")
 
         available_slots = []
+        busy = _busy_intervals(existing_events)
+        busy_idx = 0  # First busy interval that hasn't ended before current_check
 
         while current_check < max_search_date and len(available_slots) < num_slots:
             slots_checked += 1
-            # Check if this hour is within operating hours
-            if current_check.hour >= OPEN_HOUR and current_check.hour <= LAST_APPOINTMENT_HOUR:
-                # Check for conflicts with existing events
-                slot_iso = current_check.isoformat()
-                conflict = False
-
-                for event in existing_events:
-                    event_start = event.get('start', {}).get('dateTime', '')
-                    event_end = event.get('end', {}).get('dateTime', '')
-
-                    if event_start and event_end:
-                        # Parse event times
-                        event_start_dt = datetime.fromisoformat(event_start.replace('Z', '+00:00'))
-                        event_end_dt = datetime.fromisoformat(event_end.replace('Z', '+00:00'))
-
-                        # Check if our slot overlaps with this event
-                        # Our slot is 1 hour long
-                        slot_end = current_check + timedelta(hours=1)
-
-                        if (current_check < event_end_dt and slot_end > event_start_dt):
-                            conflict = True
-                            log(f"[CALENDAR] Conflict at {current_check.strftime('%A %I%p').replace(' 0', ' ')} with event: {event.get('summary', 'Untitled')}")
-                            break
-
-                if not conflict:
-                    # Found an available slot!
-                    day_name = current_check.strftime("%A")
-                    time_display = current_check.strftime("%I%p").lower().replace('0', '', 1) if current_check.strftime("%I%p").startswith('0') else current_check.strftime("%I%p").lower()
+            # Our slot is 1 hour long
+            slot_end = current_check + timedelta(hours=1)
+
+            while busy_idx < len(busy) and busy[busy_idx][1] <= current_check:
+                busy_idx += 1
+
+            if busy_idx < len(busy) and busy[busy_idx][0] < slot_end:
+                # Conflict - skip the whole busy block, landing on the first hour at or after it ends
+                busy_end = busy[busy_idx][1]
+                if _DEBUG_LOGGING:
+                    log(f"[CALENDAR DEBUG] Conflict at {current_check.strftime('%A %I%p').replace(' 0', ' ')}, busy until {busy_end.astimezone(_PACIFIC).strftime('%A %I:%M%p').replace(' 0', ' ')}")
+                current_check += timedelta(hours=-(-(busy_end - current_check) // timedelta(hours=1)))
+            else:
+                # Found an available slot!
+                day_name = current_check.strftime("%A")
+                time_display = _HOUR_DISPLAY[current_check.hour]
 
-                    log(f"[CALENDAR] ✓ FOUND available slot #{len(available_slots)+1} after checking {slots_checked} slots: {day_name} at {time_display}")
+                log(f"[CALENDAR DEBUG] ✓ FOUND available slot #{len(available_slots)+1} after checking {slots_checked} slots: {day_name} at {time_display}")
 
-                    available_slots.append({
-                        "datetime": slot_iso,
-                        "display": f"{day_name} at {time_display}"
-                    })
+                available_slots.append({
+                    "datetime": current_check.isoformat(),
+                    "display": f"{day_name} at {time_display}"
+                })
 
-                    # If we have enough slots, return them
-                    if len(available_slots) >= num_slots:
-                        log(f"[CALENDAR] ✓ Found all {num_slots} requested slots")
-                        return available_slots
+                # If we have enough slots, return them
+                if len(available_slots) >= num_slots:
+                    log(f"[CALENDAR] ✓ Found all {num_slots} requested slots")
+                    return available_slots
 
-            # Move to next hour
-            current_check += timedelta(hours=1)
+                # Move to next hour
+                current_check = slot_end
 
-            # If we've gone past last appointment hour, jump to next day at 9am
-            if current_check.hour > LAST_APPOINTMENT_HOUR or current_check.hour < OPEN_HOUR:
+            # Keep the search inside operating hours: early morning -> 9am, past last appointment -> next day at 9am
+            if current_check.hour < OPEN_HOUR:
+                current_check = current_check.replace(hour=OPEN_HOUR, minute=0, second=0, microsecond=0)
+            elif current_check.hour > LAST_APPOINTMENT_HOUR:
                 current_check = (current_check + timedelta(days=1)).replace(hour=OPEN_HOUR, minute=0, second=0, microsecond=0)
 
         # Return whatever slots we found (could be less than requested)
@@ -1624,7 +2072,6 @@ def get_available_calendar_slots(days_ahead: int = 14, num_slots: int = 1) -> li
 
     except Exception as e:
         log(f"[ERROR] ✗ Failed to get calendar slots: {e}")
-        import traceback
         log(f"[ERROR] Traceback: {traceback.format_exc()}")
         return []
 
@@ -1649,100 +2096,48 @@ def get_next_business_day_slot() -> dict:
         }
 
     try:
-        # Load service account credentials
-        google_creds_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-        google_creds_base64 = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON_BASE64")
-
-        if google_creds_base64:
-            import json
-            import base64
-            decoded = base64.b64decode(google_creds_base64).decode('utf-8')
-            credentials_info = json.loads(decoded)
-            credentials = service_account.Credentials.from_service_account_info(
-                credentials_info,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            log("[INFO] Loaded Google Calendar credentials from base64 for next business day slot")
-        elif google_creds_json:
-            import json
-            credentials_info = json.loads(google_creds_json)
-            # Fix private key newlines if they got corrupted
-            if 'private_key' in credentials_info:
-                pk = credentials_info['private_key']
-                if '\\n' in pk and '\n' not in pk:
-                    credentials_info['private_key'] = pk.replace('\\n', '\n')
-            credentials = service_account.Credentials.from_service_account_info(
-                credentials_info,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            log("[INFO] Loaded Google Calendar credentials for next business day slot")
-        elif os.path.exists(GOOGLE_CALENDAR_SERVICE_ACCOUNT):
-            credentials = service_account.Credentials.from_service_account_file(
-                GOOGLE_CALENDAR_SERVICE_ACCOUNT,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            log("[INFO] Loaded Google Calendar credentials from file for next business day slot")
-        else:
+        service = _get_calendar_service()
+        if service is None:
             log(f"[WARN] No Google Calendar credentials found for next business day slot")
             return {}
 
-        service = build('calendar', 'v3', credentials=credentials)
-
         # Calculate next business day (Monday-Friday)
-        import pytz
-        pacific = pytz.timezone('America/Los_Angeles')
-        now = datetime.now(pacific)
+        now = datetime.now(_PACIFIC)
         next_day = now + timedelta(days=1)
         while next_day.weekday() >= 5:  # Skip Saturday (5) and Sunday (6)
             next_day += timedelta(days=1)
 
-        log(f"[NEXT_DAY_SLOT] Next business day: {next_day.strftime('%A %Y-%m-%d')}")
+        log(f"[NEXT_DAY_SLOT DEBUG] Next business day: {next_day.strftime('%A %Y-%m-%d')}")
 
         # Get events for next business day
         day_start = next_day.replace(hour=0, minute=0, second=0, microsecond=0)
         day_end = next_day.replace(hour=23, minute=59, second=59, microsecond=999999)
 
-        events_result = service.events().list(
-            calendarId=GOOGLE_CALENDAR_EMAIL,
-            timeMin=day_start.isoformat(),
-            timeMax=day_end.isoformat(),
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-
-        existing_events = events_result.get('items', [])
+        existing_events = _list_calendar_events(service, day_start, day_end)
         log(f"[NEXT_DAY_SLOT] Found {len(existing_events)} existing events on {next_day.strftime('%A')}")
 
         # Operating hours: 9am - 7pm (last appointment at 6pm)
         OPEN_HOUR = 9
         LAST_APPOINTMENT_HOUR = 18  # 6pm
 
+        busy = _busy_intervals(existing_events)
+        busy_idx = 0
+
         # Try starting at 10am, then 11am, 12pm, etc.
         for hour in range(10, LAST_APPOINTMENT_HOUR + 1):
             check_time = next_day.replace(hour=hour, minute=0, second=0, microsecond=0)
+            # Check if our slot overlaps (1 hour slot)
+            slot_end = check_time + timedelta(hours=1)
 
-            # Check for conflicts
-            conflict = False
-            for event in existing_events:
-                event_start = event.get('start', {}).get('dateTime', '')
-                event_end = event.get('end', {}).get('dateTime', '')
-
-                if event_start and event_end:
-                    event_start_dt = datetime.fromisoformat(event_start.replace('Z', '+00:00'))
-                    event_end_dt = datetime.fromisoformat(event_end.replace('Z', '+00:00'))
-
-                    # Check if our slot overlaps (1 hour slot)
-                    slot_end = check_time + timedelta(hours=1)
+            while busy_idx < len(busy) and busy[busy_idx][1] <= check_time:
+                busy_idx += 1
 
-                    if (check_time < event_end_dt and slot_end > event_start_dt):
-                        conflict = True
-                        log(f"[NEXT_DAY_SLOT] {hour}:00 conflicts with: {event.get('summary', 'Untitled')}")
-                        break
-
-            if not conflict:
+            if busy_idx < len(busy) and busy[busy_idx][0] < slot_end:
+                log(f"[NEXT_DAY_SLOT DEBUG] {hour}:00 conflicts with an existing event")
+            else:
                 # Found available slot!
                 day_name = check_time.strftime("%A")
-                time_display = check_time.strftime("%I%p").lower().replace('0', '', 1) if check_time.strftime("%I%p").startswith('0') else check_time.strftime("%I%p").lower()
+                time_display = _HOUR_DISPLAY[hour]
 
                 log(f"[NEXT_DAY_SLOT] First available morning slot: {day_name} at {time_display}")
 
@@ -1757,12 +2152,11 @@ def get_next_business_day_slot() -> dict:
 
     except Exception as e:
         log(f"[ERROR] Failed to get next business day slot: {e}")
-        import traceback
         log(f"[ERROR] Traceback: {traceback.format_exc()}")
         return {}
 
-def book_calendar_appointment(slot_datetime: str, customer_name: str, customer_email: str, customer_phone: str, business_type: str) -> bool:
-    """Book an appointment in Google Calendar"""
+def book_calendar_appointment(slot_datetime: str, customer_name: str, customer_email: str, customer_phone: str, business_type: str) -> dict:
+    """Book an appointment in Google Calendar; returns {'success': bool, 'link': event link or None}"""
     log(f"[BOOKING] Attempting to book calendar appointment")
     log(f"[BOOKING] Customer: {customer_name}, Business: {business_type}")
     log(f"[BOOKING] Email: {customer_email or 'Not provided'}, Phone: {customer_phone or 'Not provided'}")
@@ -1770,57 +2164,13 @@ def book_calendar_appointment(slot_datetime: str, customer_name: str, customer_e
 
     if not GOOGLE_CALENDAR_AVAILABLE:
         log("[BOOKING] ✗ Google Calendar not available - skipping booking")
-        return False
+        return {'success': False, 'link': None}
 
     try:
-        # Load service account credentials
-        # Support both file path (local) and JSON string (Railway env var)
-        google_creds_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-        google_creds_base64 = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON_BASE64")
-
-        if google_creds_base64:
-            # Load from base64 environment variable (Railway - recommended)
-            import json
-            import base64
-            log("[BOOKING] Loading credentials from base64 environment variable...")
-            decoded = base64.b64decode(google_creds_base64).decode('utf-8')
-            credentials_info = json.loads(decoded)
-            credentials = service_account.Credentials.from_service_account_info(
-                credentials_info,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            log("[BOOKING] ✓ Credentials loaded from base64 env var")
-        elif google_creds_json:
-            # Load from environment variable (Railway)
-            import json
-            log("[BOOKING] Loading credentials from environment variable...")
-            credentials_info = json.loads(google_creds_json)
-            # Fix private key newlines if they got corrupted
-            if 'private_key' in credentials_info:
-                pk = credentials_info['private_key']
-                if '\\n' in pk and '\n' not in pk:
-                    log("[BOOKING] Fixing escaped newlines in private key")
-                    credentials_info['private_key'] = pk.replace('\\n', '\n')
-            credentials = service_account.Credentials.from_service_account_info(
-                credentials_info,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            log("[BOOKING] ✓ Credentials loaded from env var")
-        elif os.path.exists(GOOGLE_CALENDAR_SERVICE_ACCOUNT):
-            # Load from file (local development)
-            log(f"[BOOKING] Loading credentials from file: {GOOGLE_CALENDAR_SERVICE_ACCOUNT}")
-            credentials = service_account.Credentials.from_service_account_file(
-                GOOGLE_CALENDAR_SERVICE_ACCOUNT,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            log("[BOOKING] ✓ Credentials loaded from file")
-        else:
-            log(f"[BOOKING] ✗ No Google Calendar credentials found")
-            return False
-
-        log("[BOOKING] Building Google Calendar service...")
-        service = build('calendar', 'v3', credentials=credentials)
-        log("[BOOKING] ✓ Service built successfully")
+        service = _get_calendar_service()
+        if service is None:
+            log(f"[BOOKING] ✗ No Google Calendar credentials found")
+            return {'success': False, 'link': None}
 
         # Parse slot datetime
         start_time = datetime.fromisoformat(slot_datetime)
@@ -1828,8 +2178,10 @@ def book_calendar_appointment(slot_datetime: str, customer_name: str, customer_e
 
         log(f"[BOOKING] Event time: {start_time.strftime('%A, %B %d at %I:%M%p').replace(' 0', ' ')} - {end_time.strftime('%I:%M%p').replace(' 0', ' ')}")
 
-        # Create event
+        # Create event - the client-chosen id makes a retried insert (see _execute_calendar_request)
+        # fail as a duplicate instead of booking the slot twice
         event = {
+            'id': uuid.uuid4().hex,
             'summary': f'Implementation Call - {customer_name}',
             'description': f"""Bolt AI Group Implementation Call
 
@@ -1864,11 +2216,26 @@ This is an implementation call for setting up AI phone agent system.""",
 
         # Insert event
         log(f"[BOOKING] Creating event in calendar: {GOOGLE_CALENDAR_EMAIL}")
-        created_event = service.events().insert(
-            calendarId=GOOGLE_CALENDAR_EMAIL,
-            body=event,
-            sendUpdates='none'  # Don't send via Google (we handle email separately)
-        ).execute()
+        from googleapiclient.errors import HttpError
+        try:
+            created_event = _execute_calendar_request(service, lambda service: service.events().insert(
+                calendarId=GOOGLE_CALENDAR_EMAIL,
+                body=event,
+                sendUpdates='none'  # Don't send via Google (we handle email separately)
+            ))
+        except HttpError as e:
+            if e.resp.status != 409:
+                raise
+            # The id is fresh, so a duplicate means an earlier attempt whose response was lost
+            # created the event - fetch it rather than report a failed booking
+            log(f"[BOOKING] Event {event['id']} already exists (retried insert) - fetching it")
+            created_event = _execute_calendar_request(service, lambda service: service.events().get(
+                calendarId=GOOGLE_CALENDAR_EMAIL,
+                eventId=event['id']
+            ))
+        # The new event must show up as a conflict on the next slot lookup
+        with CALENDAR_EVENTS_LOCK:
+            CALENDAR_EVENTS_CACHE.clear()
 
         event_link = created_event.get('htmlLink', 'N/A')
         event_id = created_event.get('id', 'N/A')
@@ -1879,10 +2246,511 @@ This is an implementation call for setting up AI phone agent system.""",
 
     except Exception as e:
         log(f"[BOOKING] ✗ ERROR Failed to book calendar appointment: {e}")
-        import traceback
         log(f"[BOOKING] Traceback: {traceback.format_exc()}")
         return {'success': False, 'link': None}
 
+# ======================== Prompts ========================
+_PROMPT_BANNER_RE = re.compile(r'^═+\n', re.MULTILINE)
+_PROMPT_BLANK_RUN_RE = re.compile(r'\n{3,}')
+
+@lru_cache(maxsize=256)
+def build_system_message(industry, agent_name, business_name):
+    """Build the OpenAI session instructions for a business (cached - same inputs, same prompt)"""
+    if industry == 'sales':
+        greeting = "Hey there! This is Jack over at Criton AI. I actually just tried reaching you a few minutes ago. You know, the fact that you're calling me back instead of reaching a real person on your end — that's actually the exact problem we solve. We make sure businesses like yours never miss a single call. Got a sec?"
+        system_message = f"""You are {agent_name}, an enthusiastic AI sales agent for {business_name}.
+
+CRITICAL: Your FIRST response must be EXACTLY this greeting word-for-word:
+"{greeting}"
+
+═══════════════════════════════════════════════════════════════
+CONTEXT: CALLBACK SCENARIO
+═══════════════════════════════════════════════════════════════
+
+These callers are returning a missed call from you. USE THIS to your advantage — it's a live proof point. Key stats to weave in naturally:
+- 85% of callers who hit voicemail will call a competitor instead
+- The average small business misses 40% of incoming calls
+- A missed call costs the average service business $200-$1,200 in lost revenue
+
+When they ask "Who is this?" or "Why did you call me?":
+- Say: "We actually just gave you a call because we help [their industry if known, otherwise 'businesses like yours'] stop losing customers to missed calls. Funny enough, you calling me back and getting an AI instead of a person — that's the exact situation your customers deal with when they call you and nobody picks up."
+
+═══════════════════════════════════════════════════════════════
+AFTER GREETING - BRANCH INTO TWO PATHS:
+═══════════════════════════════════════════════════════════════
+
+PATH A: DEMO MODE
+If they say "demo", "show me", "demonstration", "how does it work", or similar:
+
+1. Ask: "Perfect! What type of business do you have?"
+2. WAIT for them to tell you their complete business type (HVAC, dental, barbershop, etc.)
+   ⚠️ CRITICAL: DO NOT interrupt them while they're answering! Wait for them to finish speaking.
+3. ONLY AFTER they finish answering, say EXACTLY: "Great! Let me show you how I'd handle calls for your [BusinessType]. Ready?"
+4. STOP generating text here. The user will respond with "yes", "ready", "sure", etc.
+   ⚠️ CRITICAL: DO NOT generate your demo character greeting in this same response!
+   ⚠️ You MUST wait to receive the user's actual confirmation before continuing.
+5. ONLY AFTER you receive their verbal confirmation, SWITCH INTO DEMO CHARACTER - You are now the receptionist for "ACME [BusinessType]"
+   - Greeting: "Thanks for calling ACME [BusinessType], this is Jack. How can I help you?"
+   - They will roleplay as a customer (e.g., "My AC is broken", "I need a dentist appointment")
+   - Respond with EMPATHY: "I'm sorry to hear that. That's never fun."
+
+   FOR EMERGENCY BUSINESSES (HVAC, plumbing, electrical, dental, medical):
+   - Ask: "Does Tuesday at 2pm work, or is this an emergency?"
+
+   IF THEY SAY "EMERGENCY" OR "URGENT":
+   - Say: "Okay, I'll transfer you to a representative now."
+   - IMMEDIATELY BREAK CHARACTER
+   - Say: "I would then transfer them to a representative of your choosing. What did you think? Would you like to get started and setup an implementation call?"
+   - GO TO SIGNUP FLOW
+
+   IF THEY WANT DIFFERENT TIME (e.g., "too late", "something sooner", "earlier"):
+   - Offer alternative: "No problem! How about tomorrow at 10am?"
+   - IF YES: Continue to phone number collection below
+   - IF STILL NO: "Let me transfer you to a representative who can find the perfect time for you."
+   - BREAK CHARACTER and go to signup flow
+
+   FOR NON-EMERGENCY BUSINESSES (salon, barbershop, spa, restaurant, etc.):
+   - Ask: "Does Tuesday at 2pm work for you?"
+
+   IF THEY WANT DIFFERENT TIME:
+   - Offer alternative: "No problem! How about tomorrow at 10am?"
+   - IF YES: Continue to phone number collection below
+   - IF STILL NO: "Let me transfer you to a representative who can help you find the perfect time."
+   - BREAK CHARACTER and go to signup flow
+
+   IF TIME WORKS (Tuesday 2pm OR tomorrow 10am):
+   - Say: "Perfect! Let me get your phone number for the confirmation."
+   - They give phone number
+   - Say: "Great! You're all set for [chosen time]. You'll receive a confirmation text shortly. Is there anything else I can help with?"
+   - [Handle 1-2 more exchanges naturally]
+   - BREAK CHARACTER
+   - Say: "Alright, so that's how I'd handle calls for your [BusinessType]! What did you think? Would you like to get started and setup an implementation call?"
+   - GO TO SIGNUP FLOW
+
+═══════════════════════════════════════════════════════════════
+
+PATH B: SIGNUP MODE (Direct or after demo)
+If they say "sign up", "get started", "let's do it", or YES after demo:
+
+FIRST: Offer to text the trial link:
+- Say: "Awesome! Let me text you a link to get started right now." then call the send_trial_link function.
+- After sending: "Perfect, just sent that over. You should see it pop up any second."
+
+Then continue:
+1. Say: "Great! First, what's your name?"
+2. They tell you their name
+3. ONLY ask for business type if you DON'T already know it from the demo:
+   - If coming from demo: You already know their business type - SKIP THIS STEP
+   - If direct signup (no demo): Ask "Thanks [Name]! What type of business do you have?"
+4. Book implementation appointment:
+   - Say: "Excellent! Let me find available times for your implementation call."
+   - Call get_available_slots function to retrieve available appointments
+   - Call get_next_business_day_slot function to get tomorrow morning's first available slot
+   - Offer BOTH options: "Would you like the first available [slot from get_available_slots], or does [slot from get_next_business_day_slot] work better?"
+   - Customer chooses one of the two options
+   - If customer wants a different time, call get_available_slots again and offer alternatives
+5. Collect email for calendar invitation:
+   - Say: "Perfect! What's your email address so I can send you the calendar invitation?"
+   - Confirm it back: "So that's [email] - did I get that right?"
+   - If NO, ask: "What's the correct email?" and try again
+   - Allow up to 2 attempts - if still wrong, say: "No problem, I'll send the confirmation to this phone number."
+6. Confirm booking:
+   - Call book_appointment function with chosen slot
+   - Say: "Great! You're all set for [Day at Time]. I'm sending you a calendar invitation now so you can add it right to your calendar. Looking forward to speaking with you then!"
+   - END CALL after booking
+
+═══════════════════════════════════════════════════════════════
+
+CRITICAL EMPATHY RULES:
+- When someone mentions a problem (broken AC, toothache, etc.), ALWAYS respond with empathy first
+- Examples: "I'm sorry to hear that. That's never fun." or "Oh no, that sounds frustrating."
+- Then offer help
+
+CRITICAL CHARACTER SWITCHING:
+- When entering demo mode, ask "Ready?" then immediately switch into character
+- When breaking character after demo, clearly signal: "Alright, so that's how I'd handle calls..."
+- In demo mode, you ARE the ACME receptionist - speak as that character
+- DO NOT announce pauses or say "I'm going to pause" - just switch naturally
+- Outside demo mode, you are {agent_name} from {business_name}
+
+BUSINESS NAME GENERATION:
+- Auto-generate demo business names as "ACME [BusinessType]"
+- Examples: "ACME HVAC", "ACME Dental", "ACME Barbershop", "ACME Plumbing"
+
+TRIAL LINK RULE:
+- Whenever a caller shows ANY interest (wants demo, wants to sign up, says "sounds interesting", "tell me more", etc.), offer to text them the link: "Want me to text you the link so you can check it out?"
+- If they say yes, call the send_trial_link function immediately
+- If they're about to hang up but seemed even slightly interested, offer: "Before you go, let me shoot you a quick text with the link — no pressure, just so you have it."
+- Only send ONCE per call
+
+STRICT RULES - DO NOT VIOLATE:
+- Keep responses brief (1-2 sentences max)
+- Ask ONE question at a time
+- Never mention pricing unless customer asks
+- Demo mode should be SHORT (3-5 exchanges max)
+- Always collect email for calendar invitation
+- Always book implementation appointment before ending call
+- Be warm, friendly, and professional
+
+VOICEMAIL FALLBACK:
+If the caller says any of these:
+- "Can I leave a message?"
+- "I'd like to leave a voicemail"
+- "Can someone call me back?"
+- "I'll just leave my number"
+- Seems confused and wants to speak to a human
+
+Then:
+1. Call the take_message function
+2. Say "beep!" (the beep sound)
+3. Say "Please leave your message after the beep, and I'll make sure someone gets back to you."
+4. Listen to their complete message without interrupting
+5. When they finish, call save_voicemail with all the details they provided
+6. Thank them and confirm someone will call back
+
+Be conversational, empathetic, and efficient."""
+    else:
+        system_message = f"""You are {agent_name}, a helpful AI receptionist for {business_name}.
+
+Your job is to:
+- Greet callers warmly
+- Answer questions about the business
+- Help with appointments and inquiries
+- Provide excellent customer service
+
+VOICEMAIL OPTION:
+If the caller wants to leave a message, speak to a human, or you cannot help them:
+1. Call the take_message function
+2. Say "beep!" and "Please leave your message after the beep."
+3. Listen to their complete message
+4. Call save_voicemail with their message details
+5. Thank them and confirm someone will call back
+
+Be friendly, professional, and concise. Keep responses to 1-2 sentences."""
+
+    # The ═══ banners only help humans reading this file - drop them from what's sent on every call
+    system_message = _PROMPT_BANNER_RE.sub('', system_message)
+    return _PROMPT_BLANK_RUN_RE.sub('\n\n', system_message)
+
+# Function tools available to the model on every call
+_REALTIME_TOOLS = [
+    {
+        "type": "function",
+        "name": "get_available_slots",
+        "description": "Get the first available appointment slot from the calendar. Returns the next available time starting 1 hour from now during business hours (9am-7pm daily). Call this when the user agrees to book their implementation appointment.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "days_ahead": {
+                    "type": "number",
+                    "description": "Number of days to search ahead for available slots (default 14)"
+                }
+            },
+            "required": []
+        }
+    },
+    {
+        "type": "function",
+        "name": "get_next_business_day_slot",
+        "description": "Get the first available slot for next business day (Monday-Friday) starting at 10am. If 10am is booked, tries 11am, 12pm, etc. Use this to offer 'tomorrow morning' option to customers.",
+        "parameters": {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    },
+    {
+        "type": "function",
+        "name": "book_appointment",
+        "description": "Book an appointment slot. Call this after the user selects their preferred time slot.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "slot_datetime": {
+                    "type": "string",
+                    "description": "ISO 8601 datetime string for the appointment (e.g., '2025-11-18T10:00:00')"
+                },
+                "slot_display": {
+                    "type": "string",
+                    "description": "Human-readable description of the slot (e.g., 'Monday at 10am')"
+                }
+            },
+            "required": ["slot_datetime", "slot_display"]
+        }
+    },
+    {
+        "type": "function",
+        "name": "send_trial_link",
+        "description": "Send the Criton AI trial signup link via text message to the caller's phone. Call this when the caller shows interest, agrees to check it out, or says 'yes' when you offer to text them the link. Do NOT call this more than once per call.",
+        "parameters": {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    },
+    {
+        "type": "function",
+        "name": "take_message",
+        "description": "Record a voicemail message from the caller. Call this when the caller wants to leave a message, or when you cannot help them with their request and they want someone to call them back. After calling this, say the beep sound 'beep!' and let them know they can leave their message.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "reason": {
+                    "type": "string",
+                    "description": "Brief reason for the voicemail (e.g., 'caller requested callback', 'after hours', 'complex inquiry')"
+                }
+            },
+            "required": ["reason"]
+        }
+    },
+    {
+        "type": "function",
+        "name": "save_voicemail",
+        "description": "Save the voicemail message content. Call this after the caller finishes leaving their message.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "message_content": {
+                    "type": "string",
+                    "description": "The transcribed content of the caller's voicemail message"
+                },
+                "callback_number": {
+                    "type": "string",
+                    "description": "Phone number to call back (if provided by caller)"
+                },
+                "caller_name": {
+                    "type": "string",
+                    "description": "Name of the caller (if provided)"
+                },
+                "urgency": {
+                    "type": "string",
+                    "description": "Urgency level: 'urgent', 'normal', or 'low'"
+                }
+            },
+            "required": ["message_content"]
+        }
+    }
+]
+
+def _build_session_update_template():
+    """Serialize the session.update event once; only the instructions differ between calls"""
+    # Configure VAD to be less sensitive to prevent false interruptions
+    session_config = {
+        "model": MODEL,  # REQUIRED: Specify the Realtime API model
+        "turn_detection": {
+            "type": "server_vad",
+            "threshold": 0.5,  # Lower = more sensitive to silence (prevents cutting off mid-sentence) (default 0.5)
+            "prefix_padding_ms": 300,  # Audio before speech (default 300ms)
+            "silence_duration_ms": 1500  # Wait 1.5 seconds of silence before ending turn
+        },
+        "input_audio_format": "g711_ulaw",
+        "instructions": _INSTRUCTIONS_PLACEHOLDER,
+        "temperature": TEMPERATURE,
+        "input_audio_transcription": {"model": "whisper-1"},  # Enable user speech transcription
+    }
+
+    # Configure modalities based on TTS provider
+    if USE_ELEVENLABS:
+        # Text-only mode: OpenAI handles conversation, ElevenLabs handles TTS
+        session_config["modalities"] = ["text"]
+    else:
+        # Full audio mode: OpenAI handles both conversation and TTS
+        session_config["modalities"] = ["text", "audio"]
+        session_config["output_audio_format"] = "g711_ulaw"
+        session_config["voice"] = VOICE
+
+    session_config["tools"] = _REALTIME_TOOLS
+    session_config["tool_choice"] = "auto"
+
+    return orjson.dumps({
+        "type": "session.update",
+        "session": session_config
+    })
+
+_INSTRUCTIONS_PLACEHOLDER = "__SESSION_INSTRUCTIONS__"
+_SESSION_UPDATE_TEMPLATE = _build_session_update_template()
+
+def build_session_update(system_message):
+    """session.update frame for the given instructions (JSON-escaped into the template)"""
+    instructions = orjson.dumps(system_message)[1:-1]  # Escaped string body, without the quotes
+    return _SESSION_UPDATE_TEMPLATE.replace(_INSTRUCTIONS_PLACEHOLDER.encode(), instructions, 1).decode()
+
+_RESPONSE_CREATE_FRAME = orjson.dumps({"type": "response.create"}).decode()  # Sent after every tool result / greeting
+_RESPONSE_CANCEL_FRAME = orjson.dumps({"type": "response.cancel"}).decode()  # Stops generation on a local barge-in
+# Fixed-shape frames filled in with %-formatting. Twilio SIDs and OpenAI item ids are plain
+# [A-Za-z0-9_] identifiers, so they need no JSON escaping.
+_MARK_FRAME_TEMPLATE = '{"event":"mark","streamSid":"%s","mark":{"name":"responsePart"}}'
+_CLEAR_FRAME_TEMPLATE = '{"event":"clear","streamSid":"%s"}'
+_TRUNCATE_FRAME_TEMPLATE = '{"type":"conversation.item.truncate","item_id":"%s","content_index":0,"audio_end_ms":%d}'
+
+# OpenAI Realtime events send_to_twilio has no handler for (transcript/text deltas arrive per token)
+_IGNORED_OPENAI_EVENTS = frozenset({
+    'session.created', 'session.updated', 'rate_limits.updated',
+    'input_audio_buffer.committed', 'input_audio_buffer.speech_stopped', 'conversation.item.created',
+    'response.created', 'response.output_item.added', 'response.output_item.done',
+    'response.content_part.added', 'response.content_part.done', 'response.audio.done',
+    'response.audio_transcript.delta', 'response.text.delta', 'response.text.done',
+    'response.function_call_arguments.delta',
+})
+_EVENT_TYPE_RE = re.compile(r'\{\s*"type"\s*:\s*"([^"]+)"')
+
+def _sniff_event_type(message):
+    """Event type read from the raw frame when "type" is the first key (OpenAI sends it first), else None"""
+    match = _EVENT_TYPE_RE.match(message)
+    return match.group(1) if match else None
+
+def _join_base64_audio(payloads):
+    """Join base64 audio chunks into one base64 string.
+
+    Base64 strings join as text when every one but the last is unpadded (whole 3-byte groups);
+    only a padded chunk in the middle forces a round-trip through the raw bytes.
+    """
+    if len(payloads) == 1:
+        return payloads[0]
+    if not any(p.endswith("=") for p in payloads[:-1]):
+        return "".join(payloads)
+    return base64.b64encode(b"".join(base64.b64decode(p) for p in payloads)).decode()
+
+# ======================== Realtime Tools ========================
+# Handlers for the function calls the Realtime session can make. Each takes the parsed
+# arguments, the call's session (None if it's gone) and the call SID, and returns the
+# result sent back to OpenAI as the function_call_output.
+
+async def _tool_get_available_slots(arguments, session, call_sid):
+    """First open calendar slot in the next days_ahead days"""
+    days_ahead = arguments.get('days_ahead', 14)
+    # Google Calendar calls block - keep them off the loop that's pumping call audio
+    slots = await asyncio.get_event_loop().run_in_executor(None, partial(get_available_calendar_slots, days_ahead=days_ahead, num_slots=1))
+    if slots:
+        function_result = {
+            "first_available": slots[0],
+            "message": f"First available appointment is {slots[0]['display']}"
+        }
+        log(f"[FUNCTION RESULT] First available slot: {slots[0]['display']}")
+    else:
+        function_result = {
+            "first_available": None,
+            "message": "No available appointments found in the next 14 days"
+        }
+        log(f"[FUNCTION RESULT] No available slots found")
+    return function_result
+
+async def _tool_get_next_business_day_slot(arguments, session, call_sid):
+    """First open slot on the next business day"""
+    next_day_slot = await asyncio.get_event_loop().run_in_executor(None, get_next_business_day_slot)
+    if next_day_slot:
+        function_result = {
+            "next_business_day_slot": next_day_slot,
+            "message": f"Next business day slot: {next_day_slot['display']}"
+        }
+        log(f"[FUNCTION RESULT] Next business day slot: {next_day_slot['display']}")
+    else:
+        function_result = {
+            "next_business_day_slot": None,
+            "message": "No available slots on next business day"
+        }
+        log(f"[FUNCTION RESULT] No next business day slots found")
+    return function_result
+
+async def _tool_book_appointment(arguments, session, call_sid):
+    """Record the chosen slot in the session for the end-of-call follow-up"""
+    slot_datetime = arguments.get('slot_datetime')
+    slot_display = arguments.get('slot_display')
+
+    if slot_datetime and slot_display and session:
+        # Store appointment info in session
+        session['appointment_datetime'] = slot_datetime
+        session['appointment_display'] = slot_display
+        log(f"[APPOINTMENT] Stored in session: {slot_display} ({slot_datetime})")
+
+        function_result = {
+            "success": True,
+            "message": f"Appointment booked for {slot_display}"
+        }
+    else:
+        function_result = {
+            "success": False,
+            "message": "Missing required information for booking"
+        }
+    return function_result
+
+async def _tool_send_trial_link(arguments, session, call_sid):
+    """Text the free-trial signup link to the caller"""
+    caller_phone = session.get('caller_phone', '') if session else ''
+    if caller_phone:
+        sms_sent = await asyncio.get_event_loop().run_in_executor(None, send_trial_link_sms, caller_phone)
+        function_result = {
+            "success": sms_sent,
+            "message": "Trial link texted to the caller's phone. Let them know to check their texts." if sms_sent else "Failed to send text. Apologize and offer to email the link instead."
+        }
+        log(f"[TRIAL LINK] SMS {'sent' if sms_sent else 'FAILED'} to {caller_phone}")
+    else:
+        function_result = {
+            "success": False,
+            "message": "No phone number available. Ask the caller for their phone number to text the link."
+        }
+    return function_result
+
+async def _tool_take_message(arguments, session, call_sid):
+    """Switch the call into voicemail mode"""
+    reason = arguments.get('reason', 'caller requested')
+    log(f"[VOICEMAIL] Starting voicemail mode - reason: {reason}")
+
+    if session:
+        session['voicemail_mode'] = True
+        session['voicemail_reason'] = reason
+
+    function_result = {
+        "success": True,
+        "message": "Voicemail mode activated. Say 'beep!' and prompt the caller to leave their message after the beep. Listen to their entire message, then call save_voicemail with the transcribed content."
+    }
+    return function_result
+
+async def _tool_save_voicemail(arguments, session, call_sid):
+    """Save the caller's voicemail to the session and call_transcripts"""
+    message_content = arguments.get('message_content', '')
+    callback_number = arguments.get('callback_number')
+    caller_name = arguments.get('caller_name')
+    urgency = arguments.get('urgency', 'normal')
+
+    log(f"[VOICEMAIL] Saving voicemail - caller: {caller_name}, urgency: {urgency}")
+    log(f"[VOICEMAIL] Message: {message_content[:100]}...")
+
+    if session:
+        session['voicemail_message'] = message_content
+        session['voicemail_callback'] = callback_number
+        session['voicemail_urgency'] = urgency
+        if caller_name:
+            session['customer_name'] = caller_name
+
+        # Save voicemail to database
+        if call_sid and SUPABASE:
+            try:
+                # Store as a transcript entry with type 'voicemail'
+                await db_call(SUPABASE.table('call_transcripts').insert({
+                    "call_sid": call_sid,
+                    "role": "voicemail",
+                    "content": f"[{urgency.upper()}] {caller_name or 'Unknown'} ({callback_number or session.get('caller_phone', 'No callback number')}): {message_content}"
+                }).execute)
+                log(f"[VOICEMAIL] Saved to database for call {call_sid}")
+            except Exception as e:
+                log(f"[VOICEMAIL] Error saving to database: {e}")
+
+    function_result = {
+        "success": True,
+        "message": f"Voicemail saved successfully. Thank the caller and let them know someone will get back to them soon."
+    }
+    return function_result
+
+TOOLS = {
+    "get_available_slots": _tool_get_available_slots,
+    "get_next_business_day_slot": _tool_get_next_business_day_slot,
+    "book_appointment": _tool_book_appointment,
+    "send_trial_link": _tool_send_trial_link,
+    "take_message": _tool_take_message,
+    "save_voicemail": _tool_save_voicemail,
+}
+
 # ======================== Routes ========================
 @app.get("/", response_class=JSONResponse)
 async def index_page():
@@ -1939,19 +2807,19 @@ async def monitoring_dashboard():
             try:
                 # Get call counts from last 24 hours
                 yesterday = (datetime.now() - timedelta(days=1)).isoformat()
-                calls_24h = supabase.table('calls').select('*').gte('created_at', yesterday).execute()
+                calls_24h = await db_call(supabase.table('calls').select('status').gte('created_at', yesterday).execute)
 
                 db_stats = {
                     "calls_last_24h": len(calls_24h.data) if calls_24h.data else 0,
                     "completed_calls_24h": len([c for c in calls_24h.data if c.get('status') == 'completed']) if calls_24h.data else 0,
-                    "failed_calls_24h": len([c for c in calls_24h.data if c.get('status') in ['failed', 'busy', 'no-answer']]) if calls_24h.data else 0,
+                    "failed_calls_24h": len([c for c in calls_24h.data if c.get('status') in FAILED_CALL_STATUSES]) if calls_24h.data else 0,
                 }
             except Exception as e:
                 db_stats = {"error": str(e)}
 
         return {
             "status": "healthy",
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
             "environment": SENTRY_ENVIRONMENT if SENTRY_DSN else "unknown",
             "services": {
                 "supabase": supabase_status,
@@ -1978,9 +2846,25 @@ async def monitoring_dashboard():
         return {
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.utcnow().isoformat() + "Z"
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds")
         }
 
+def _build_twiml_templates():
+    """Render the fixed TwiML responses once with the Twilio SDK"""
+    not_configured = VoiceResponse()
+    not_configured.say("Sorry, this number is not configured.")
+    not_configured.hangup()
+
+    media_stream = VoiceResponse()
+    connect = Connect()
+    connect.stream(url='wss://{host}/media-stream')
+    media_stream.append(connect)
+
+    return str(not_configured), str(media_stream)
+
+# TwiML never changes between calls (only the host in the stream URL), so build it once
+_NOT_CONFIGURED_TWIML, _MEDIA_STREAM_TWIML = _build_twiml_templates()
+
 @app.api_route("/inbound", methods=["GET", "POST"])
 @app.api_route("/voice/incoming", methods=["GET", "POST"])
 async def handle_incoming_call(request: Request):
@@ -1993,16 +2877,13 @@ async def handle_incoming_call(request: Request):
     log(f"Inbound call: {call_sid}, from={from_number}, to={to_number}")
 
     # Look up business
-    business = get_business_for_phone(to_number)
+    business = await db_call(get_business_for_phone, to_number)
     if not business:
         log(f"No business found for {to_number}")
-        response = VoiceResponse()
-        response.say("Sorry, this number is not configured.")
-        response.hangup()
-        return HTMLResponse(content=str(response), media_type="application/xml")
+        return HTMLResponse(content=_NOT_CONFIGURED_TWIML, media_type="application/xml")
 
     # Create call record
-    call_record = create_call_record(business['id'], from_number, call_sid, to_number)
+    call_record = await db_call(create_call_record, business['id'], from_number, call_sid, to_number)
 
     # Store session
     call_start_time = datetime.now()
@@ -2023,13 +2904,23 @@ async def handle_incoming_call(request: Request):
         "appointment_display": None  # Human-readable slot (e.g., "Tuesday at 2pm")
     }
 
-    # Send instant call alert to business owner
+    # Send instant call alert to business owner (in a thread - SMTP retries can take seconds)
     log(f"Sending instant call alert for {from_number}")
-    send_instant_call_alert(call_sid, from_number, call_start_time)
+    spawn_background_task(asyncio.to_thread(send_instant_call_alert, call_sid, from_number, call_start_time))
 
     # Start call recording via REST API (for Media Streams, we can't use TwiML record)
-    # This starts recording immediately when the call is answered
+    # This starts recording immediately when the call is answered - in a thread so the TwiML goes back right away
     host = request.url.hostname
+    spawn_background_task(asyncio.to_thread(start_call_recording, call_sid, host))
+
+    # Start Media Stream
+    return HTMLResponse(content=_MEDIA_STREAM_TWIML.format(host=host), media_type="application/xml")
+
+def start_call_recording(call_sid, host):
+    """Start a dual-channel Twilio recording for the call"""
+    if not TWILIO_CLIENT:
+        log(f"Failed to start recording for call {call_sid}: Twilio not configured")
+        return
     try:
         recording = TWILIO_CLIENT.calls(call_sid).recordings.create(
             recording_status_callback=f'https://{host}/recording-status',
@@ -2040,13 +2931,66 @@ async def handle_incoming_call(request: Request):
     except Exception as e:
         log(f"Failed to start recording for call {call_sid}: {e}")
 
-    # Start Media Stream
-    response = VoiceResponse()
-    connect = Connect()
-    connect.stream(url=f'wss://{host}/media-stream')
-    response.append(connect)
+# ======================== Browser Realtime (WebRTC) ========================
+# Browser clients talk to OpenAI directly over WebRTC; this server only mints the short-lived
+# key, so their audio never passes through the event loop serving Twilio streams
+
+def create_realtime_client_secret(instructions):
+    """Create an OpenAI Realtime session and return its ephemeral client_secret"""
+    response = requests.post(
+        "https://api.openai.com/v1/realtime/sessions",
+        headers={
+            "Authorization": f"Bearer {OPENAI_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        data=orjson.dumps({
+            "model": MODEL,
+            "voice": VOICE,
+            "instructions": instructions,
+            "temperature": TEMPERATURE,
+            "turn_detection": {"type": "server_vad", "silence_duration_ms": 1500},
+            "input_audio_transcription": {"model": "whisper-1"}
+        }),
+        timeout=10
+    )
+    if response.status_code != 200:
+        raise Exception(f"Failed to create Realtime session: {response.status_code} - {response.text}")
+    return response.json()["client_secret"]
+
+@app.post("/realtime/ephemeral")
+async def realtime_ephemeral_key(request: Request):
+    """Mint an ephemeral OpenAI Realtime key for a browser WebRTC client (optional JSON body: {"phone": business number})"""
+    # Every key minted here is billed to OPENAI_API_KEY, so callers must present the shared token
+    if not REALTIME_CLIENT_TOKEN:
+        return JSONResponse(content={"error": "Browser realtime not enabled"}, status_code=403)
+    if not hmac.compare_digest(request.headers.get("authorization", "").encode(), f"Bearer {REALTIME_CLIENT_TOKEN}".encode()):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=401)
+
+    if not OPENAI_API_KEY:
+        return JSONResponse(content={"error": "OpenAI not configured"}, status_code=500)
 
-    return HTMLResponse(content=str(response), media_type="application/xml")
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+
+    business = {}
+    if body.get("phone"):
+        business = await db_call(get_business_for_phone, body["phone"]) or {}
+    system_message = build_system_message(
+        business.get('industry', 'sales'),
+        business.get('agent_name', AGENT_NAME),
+        business.get('business_name', COMPANY_NAME)
+    )
+
+    try:
+        client_secret = await asyncio.get_event_loop().run_in_executor(None, create_realtime_client_secret, system_message)
+        return JSONResponse(content={"client_secret": client_secret, "model": MODEL})
+    except Exception as e:
+        log(f"[ERROR] Realtime ephemeral key failed: {e}")
+        return JSONResponse(content={"error": str(e)}, status_code=502)
 
 # ======================== ElevenLabs Conversational AI Integration ========================
 
@@ -2097,7 +3041,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
             signed_url,
             ping_interval=20,
             ping_timeout=10,
-            ssl=ssl.create_default_context(cafile=certifi.where())
+            ssl=_SSL_CTX
         )
 
         log(f"[ElevenLabs] Connected to Conversational AI")
@@ -2116,7 +3060,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
                     if not elevenlabs_connected:
                         break
 
-                    data = json.loads(message)
+                    data = orjson.loads(message)
 
                     if data['event'] == 'connected':
                         log(f"[Twilio] Connected event received")
@@ -2138,7 +3082,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
                             audio_message = {
                                 "user_audio_chunk": data['media']['payload']
                             }
-                            await elevenlabs_ws.send(json.dumps(audio_message))
+                            await elevenlabs_ws.send(orjson.dumps(audio_message).decode())
                         except websockets.exceptions.ConnectionClosed as e:
                             log(f"[ElevenLabs] Connection closed while sending audio. Code: {e.code if hasattr(e, 'code') else 'unknown'}, Reason: {e.reason if hasattr(e, 'reason') else 'unknown'}")
                             elevenlabs_connected = False
@@ -2180,7 +3124,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
             try:
                 async for message in elevenlabs_ws:
                     try:
-                        response = json.loads(message)
+                        response = orjson.loads(message)
                         event_type = response.get('type')
 
                         # DEBUG: Log all events to see what we're receiving
@@ -2188,7 +3132,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
 
                         if event_type == 'conversation_initiation_metadata':
                             metadata = response.get('conversation_initiation_metadata_event', {})
-                            log(f"[ElevenLabs] Conversation initiated. Agent config: {json.dumps(metadata, indent=2)[:500]}")
+                            log(f"[ElevenLabs] Conversation initiated. Agent config: {orjson.dumps(metadata, option=orjson.OPT_INDENT_2).decode()[:500]}")
 
                         elif event_type == 'audio':
                             # DEBUG: Log audio_event structure
@@ -2218,7 +3162,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
                                             "payload": audio_base64
                                         }
                                     }
-                                    await websocket.send_text(json.dumps(twilio_message))
+                                    await websocket.send_text(orjson.dumps(twilio_message).decode())
                                     log(f"[ElevenLabs] Forwarded audio to Twilio ({len(audio_base64)} chars)")
                                 except Exception as e:
                                     log(f"[ERROR] Audio forward failed: {e}")
@@ -2228,11 +3172,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
                         elif event_type == 'interruption':
                             # User interrupted agent - clear Twilio playback buffer
                             if stream_sid:
-                                clear_message = {
-                                    "event": "clear",
-                                    "streamSid": stream_sid
-                                }
-                                await websocket.send_text(json.dumps(clear_message))
+                                await websocket.send_text(_CLEAR_FRAME_TEMPLATE % stream_sid)
                                 log(f"[ElevenLabs] Interruption detected - cleared Twilio buffer")
 
                         elif event_type == 'ping':
@@ -2242,7 +3182,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
                                     "type": "pong",
                                     "event_id": response['ping_event']['event_id']
                                 }
-                                await elevenlabs_ws.send(json.dumps(pong_message))
+                                await elevenlabs_ws.send(orjson.dumps(pong_message).decode())
 
                         elif event_type == 'agent_response':
                             # DEBUG: Log agent_response_event structure
@@ -2259,7 +3199,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
                                         "payload": audio_base64
                                     }
                                 }
-                                await websocket.send_text(json.dumps(twilio_message))
+                                await websocket.send_text(orjson.dumps(twilio_message).decode())
                                 log(f"[ElevenLabs] Forwarded agent audio to Twilio")
 
                         elif event_type == 'user_transcript' or event_type == 'agent_transcript':
@@ -2274,7 +3214,7 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
                         else:
                             log(f"[ElevenLabs] Unhandled event type: {event_type}")
 
-                    except json.JSONDecodeError as e:
+                    except orjson.JSONDecodeError as e:
                         log(f"[ElevenLabs] JSON decode error: {e}")
                     except Exception as e:
                         log(f"[ElevenLabs] Error processing message: {e}")
@@ -2295,7 +3235,6 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
 
     except Exception as e:
         log(f"[ElevenLabs] Handler error for {call_sid}: {e}")
-        import traceback
         log(f"[ElevenLabs] Traceback: {traceback.format_exc()}")
 
     finally:
@@ -2307,407 +3246,133 @@ async def handle_media_stream_elevenlabs(websocket: WebSocket):
             except:
                 pass
 
-        log(f"[ElevenLabs] Handler complete for call {call_sid}")
-
-@app.websocket("/media-stream")
-async def handle_media_stream(websocket: WebSocket):
-    """Handle Twilio Media Stream WebSocket - Routes to ElevenLabs or OpenAI based on feature flag"""
-    log("Media stream WebSocket connected")
-    await websocket.accept()
-
-    # Feature flag routing: ElevenLabs Conversational AI vs OpenAI Realtime API
-    if USE_ELEVENLABS_CONVERSATIONAL_AI:
-        log("[ROUTING] Using ElevenLabs Conversational AI")
-        await handle_media_stream_elevenlabs(websocket)
-        return  # ElevenLabs handler complete
-
-    # Otherwise, use OpenAI Realtime API (existing implementation)
-    log("[ROUTING] Using OpenAI Realtime API + ElevenLabs TTS")
-
-    call_sid = None
-    stream_sid = None
-    heartbeat_task = None
-
-    # Connect to OpenAI with retry logic
-    log("Connecting to OpenAI Realtime API with retry logic...")
-    openai_ws = await connect_to_openai_with_retry(max_retries=WS_MAX_RETRIES)
-
-    if openai_ws is None:
-        log("CRITICAL: Failed to establish OpenAI connection after all retries")
-        CALL_METRICS["websocket"]["failed_calls"] += 1
-        return
-
-    # Start heartbeat task to keep connection alive
-    heartbeat_task = asyncio.create_task(ws_heartbeat(openai_ws, interval=WEBSOCKET_PING_INTERVAL))
-    log("[WS] Heartbeat task started")
-
-    try:
-        latest_media_timestamp = 0
-        last_assistant_item = None
-        mark_queue = []
-        response_start_timestamp_twilio = None
-        stream_start_time = None  # Track when stream started to prevent early interruptions
-
-        async def send_error_message_to_caller(ws, sid):
-            """Send graceful error message to caller when OpenAI fails"""
-            try:
-                if not sid:
-                    log("Cannot send error message - no stream SID")
-                    return
-
-                error_message = "I apologize, but I'm experiencing technical difficulties right now. Our team has your phone number and will call you back shortly. Thank you for your patience."
-                log(f"Sending error message to caller: {error_message}")
-
-                # Note: We can't synthesize speech without OpenAI, so we just log and disconnect gracefully
-                # The call will end, and the status callback will trigger follow-up
-
-            except Exception as e:
-                log(f"Error sending fallback message: {e}")
-
-        async def receive_from_twilio():
-            """Receive audio from Twilio and send to OpenAI"""
-            nonlocal stream_sid, latest_media_timestamp, call_sid, stream_start_time
-            try:
-                async for message in websocket.iter_text():
-                    data = json.loads(message)
-
-                    if data['event'] == 'media':
-                        latest_media_timestamp = int(data['media']['timestamp'])
-                        audio_append = {
-                            "type": "input_audio_buffer.append",
-                            "audio": data['media']['payload']
-                        }
-                        await openai_ws.send(json.dumps(audio_append))
-
-                    elif data['event'] == 'start':
-                        stream_sid = data['start']['streamSid']
-                        call_sid = data['start']['customParameters'].get('CallSid') or data['start'].get('callSid')
-                        stream_start_time = time.time()  # Track when stream started
-                        log(f"Stream started: {stream_sid}, Call: {call_sid}")
-
-                        # Get session data
-                        session = SESSIONS.get(call_sid, {})
-                        business = session.get('business', {})
-                        agent_name = business.get('agent_name', AGENT_NAME)
-                        business_name = business.get('business_name', COMPANY_NAME)
-                        industry = business.get('industry', 'sales')
-
-                        # Configure OpenAI session based on business
-                        if industry == 'sales':
-                            greeting = "Hey there! This is Jack over at Criton AI. I actually just tried reaching you a few minutes ago. You know, the fact that you're calling me back instead of reaching a real person on your end — that's actually the exact problem we solve. We make sure businesses like yours never miss a single call. Got a sec?"
-                            system_message = f"""You are {agent_name}, an enthusiastic AI sales agent for {business_name}.
-
-CRITICAL: Your FIRST response must be EXACTLY this greeting word-for-word:
-"{greeting}"
-
-═══════════════════════════════════════════════════════════════
-CONTEXT: CALLBACK SCENARIO
-═══════════════════════════════════════════════════════════════
-
-These callers are returning a missed call from you. USE THIS to your advantage — it's a live proof point. Key stats to weave in naturally:
-- 85% of callers who hit voicemail will call a competitor instead
-- The average small business misses 40% of incoming calls
-- A missed call costs the average service business $200-$1,200 in lost revenue
-
-When they ask "Who is this?" or "Why did you call me?":
-- Say: "We actually just gave you a call because we help [their industry if known, otherwise 'businesses like yours'] stop losing customers to missed calls. Funny enough, you calling me back and getting an AI instead of a person — that's the exact situation your customers deal with when they call you and nobody picks up."
-
-═══════════════════════════════════════════════════════════════
-AFTER GREETING - BRANCH INTO TWO PATHS:
-═══════════════════════════════════════════════════════════════
-
-PATH A: DEMO MODE
-If they say "demo", "show me", "demonstration", "how does it work", or similar:
-
-1. Ask: "Perfect! What type of business do you have?"
-2. WAIT for them to tell you their complete business type (HVAC, dental, barbershop, etc.)
-   ⚠️ CRITICAL: DO NOT interrupt them while they're answering! Wait for them to finish speaking.
-3. ONLY AFTER they finish answering, say EXACTLY: "Great! Let me show you how I'd handle calls for your [BusinessType]. Ready?"
-4. STOP generating text here. The user will respond with "yes", "ready", "sure", etc.
-   ⚠️ CRITICAL: DO NOT generate your demo character greeting in this same response!
-   ⚠️ You MUST wait to receive the user's actual confirmation before continuing.
-5. ONLY AFTER you receive their verbal confirmation, SWITCH INTO DEMO CHARACTER - You are now the receptionist for "ACME [BusinessType]"
-   - Greeting: "Thanks for calling ACME [BusinessType], this is Jack. How can I help you?"
-   - They will roleplay as a customer (e.g., "My AC is broken", "I need a dentist appointment")
-   - Respond with EMPATHY: "I'm sorry to hear that. That's never fun."
-
-   FOR EMERGENCY BUSINESSES (HVAC, plumbing, electrical, dental, medical):
-   - Ask: "Does Tuesday at 2pm work, or is this an emergency?"
-
-   IF THEY SAY "EMERGENCY" OR "URGENT":
-   - Say: "Okay, I'll transfer you to a representative now."
-   - IMMEDIATELY BREAK CHARACTER
-   - Say: "I would then transfer them to a representative of your choosing. What did you think? Would you like to get started and setup an implementation call?"
-   - GO TO SIGNUP FLOW
-
-   IF THEY WANT DIFFERENT TIME (e.g., "too late", "something sooner", "earlier"):
-   - Offer alternative: "No problem! How about tomorrow at 10am?"
-   - IF YES: Continue to phone number collection below
-   - IF STILL NO: "Let me transfer you to a representative who can find the perfect time for you."
-   - BREAK CHARACTER and go to signup flow
-
-   FOR NON-EMERGENCY BUSINESSES (salon, barbershop, spa, restaurant, etc.):
-   - Ask: "Does Tuesday at 2pm work for you?"
-
-   IF THEY WANT DIFFERENT TIME:
-   - Offer alternative: "No problem! How about tomorrow at 10am?"
-   - IF YES: Continue to phone number collection below
-   - IF STILL NO: "Let me transfer you to a representative who can help you find the perfect time."
-   - BREAK CHARACTER and go to signup flow
-
-   IF TIME WORKS (Tuesday 2pm OR tomorrow 10am):
-   - Say: "Perfect! Let me get your phone number for the confirmation."
-   - They give phone number
-   - Say: "Great! You're all set for [chosen time]. You'll receive a confirmation text shortly. Is there anything else I can help with?"
-   - [Handle 1-2 more exchanges naturally]
-   - BREAK CHARACTER
-   - Say: "Alright, so that's how I'd handle calls for your [BusinessType]! What did you think? Would you like to get started and setup an implementation call?"
-   - GO TO SIGNUP FLOW
+        # Write out the rest of the transcript
+        if call_sid:
+            await db_call(flush_call_transcripts, call_sid)
 
-═══════════════════════════════════════════════════════════════
+        log(f"[ElevenLabs] Handler complete for call {call_sid}")
 
-PATH B: SIGNUP MODE (Direct or after demo)
-If they say "sign up", "get started", "let's do it", or YES after demo:
+@app.websocket("/media-stream")
+async def handle_media_stream(websocket: WebSocket):
+    """Handle Twilio Media Stream WebSocket - Routes to ElevenLabs or OpenAI based on feature flag"""
+    log("Media stream WebSocket connected")
+    await websocket.accept()
 
-FIRST: Offer to text the trial link:
-- Say: "Awesome! Let me text you a link to get started right now." then call the send_trial_link function.
-- After sending: "Perfect, just sent that over. You should see it pop up any second."
+    # Feature flag routing: ElevenLabs Conversational AI vs OpenAI Realtime API
+    if USE_ELEVENLABS_CONVERSATIONAL_AI:
+        log("[ROUTING] Using ElevenLabs Conversational AI")
+        await handle_media_stream_elevenlabs(websocket)
+        return  # ElevenLabs handler complete
 
-Then continue:
-1. Say: "Great! First, what's your name?"
-2. They tell you their name
-3. ONLY ask for business type if you DON'T already know it from the demo:
-   - If coming from demo: You already know their business type - SKIP THIS STEP
-   - If direct signup (no demo): Ask "Thanks [Name]! What type of business do you have?"
-4. Book implementation appointment:
-   - Say: "Excellent! Let me find available times for your implementation call."
-   - Call get_available_slots function to retrieve available appointments
-   - Call get_next_business_day_slot function to get tomorrow morning's first available slot
-   - Offer BOTH options: "Would you like the first available [slot from get_available_slots], or does [slot from get_next_business_day_slot] work better?"
-   - Customer chooses one of the two options
-   - If customer wants a different time, call get_available_slots again and offer alternatives
-5. Collect email for calendar invitation:
-   - Say: "Perfect! What's your email address so I can send you the calendar invitation?"
-   - Confirm it back: "So that's [email] - did I get that right?"
-   - If NO, ask: "What's the correct email?" and try again
-   - Allow up to 2 attempts - if still wrong, say: "No problem, I'll send the confirmation to this phone number."
-6. Confirm booking:
-   - Call book_appointment function with chosen slot
-   - Say: "Great! You're all set for [Day at Time]. I'm sending you a calendar invitation now so you can add it right to your calendar. Looking forward to speaking with you then!"
-   - END CALL after booking
+    # Otherwise, use OpenAI Realtime API (existing implementation)
+    log("[ROUTING] Using OpenAI Realtime API + ElevenLabs TTS")
 
-═══════════════════════════════════════════════════════════════
+    call_sid = None
+    stream_sid = None
+    heartbeat_task = None
 
-CRITICAL EMPATHY RULES:
-- When someone mentions a problem (broken AC, toothache, etc.), ALWAYS respond with empathy first
-- Examples: "I'm sorry to hear that. That's never fun." or "Oh no, that sounds frustrating."
-- Then offer help
+    # Connect to OpenAI with retry logic
+    log("Connecting to OpenAI Realtime API with retry logic...")
+    openai_ws = await acquire_openai_ws()
 
-CRITICAL CHARACTER SWITCHING:
-- When entering demo mode, ask "Ready?" then immediately switch into character
-- When breaking character after demo, clearly signal: "Alright, so that's how I'd handle calls..."
-- In demo mode, you ARE the ACME receptionist - speak as that character
-- DO NOT announce pauses or say "I'm going to pause" - just switch naturally
-- Outside demo mode, you are {agent_name} from {business_name}
+    if openai_ws is None:
+        log("CRITICAL: Failed to establish OpenAI connection after all retries")
+        CALL_METRICS["websocket"]["failed_calls"] += 1
+        return
 
-BUSINESS NAME GENERATION:
-- Auto-generate demo business names as "ACME [BusinessType]"
-- Examples: "ACME HVAC", "ACME Dental", "ACME Barbershop", "ACME Plumbing"
+    # Start heartbeat task to keep connection alive
+    heartbeat_task = asyncio.create_task(ws_heartbeat(openai_ws, interval=WEBSOCKET_PING_INTERVAL))
+    log("[WS] Heartbeat task started")
 
-TRIAL LINK RULE:
-- Whenever a caller shows ANY interest (wants demo, wants to sign up, says "sounds interesting", "tell me more", etc.), offer to text them the link: "Want me to text you the link so you can check it out?"
-- If they say yes, call the send_trial_link function immediately
-- If they're about to hang up but seemed even slightly interested, offer: "Before you go, let me shoot you a quick text with the link — no pressure, just so you have it."
-- Only send ONCE per call
+    try:
+        latest_media_timestamp = 0
+        last_assistant_item = None
+        mark_queue = deque()  # Marks sent to Twilio whose audio hasn't finished playing yet
+        extraction_lock = asyncio.Lock()  # One extract_customer_info at a time per call (transcript order)
+        twilio_audio_queue = asyncio.Queue()  # OpenAI audio deltas waiting for send_audio_to_twilio
+        openai_audio_queue = asyncio.Queue()  # Caller audio (base64 μ-law) waiting for send_audio_to_openai
+        audio_chunks_sent = 0  # Media frames send_audio_to_twilio has delivered this call
+        response_start_timestamp_twilio = None
+        stream_start_time = None  # Track when stream started to prevent early interruptions
 
-STRICT RULES - DO NOT VIOLATE:
-- Keep responses brief (1-2 sentences max)
-- Ask ONE question at a time
-- Never mention pricing unless customer asks
-- Demo mode should be SHORT (3-5 exchanges max)
-- Always collect email for calendar invitation
-- Always book implementation appointment before ending call
-- Be warm, friendly, and professional
+        async def send_error_message_to_caller(ws, sid):
+            """Send graceful error message to caller when OpenAI fails"""
+            try:
+                if not sid:
+                    log("Cannot send error message - no stream SID")
+                    return
 
-VOICEMAIL FALLBACK:
-If the caller says any of these:
-- "Can I leave a message?"
-- "I'd like to leave a voicemail"
-- "Can someone call me back?"
-- "I'll just leave my number"
-- Seems confused and wants to speak to a human
+                error_message = "I apologize, but I'm experiencing technical difficulties right now. Our team has your phone number and will call you back shortly. Thank you for your patience."
+                log(f"Sending error message to caller: {error_message}")
 
-Then:
-1. Call the take_message function
-2. Say "beep!" (the beep sound)
-3. Say "Please leave your message after the beep, and I'll make sure someone gets back to you."
-4. Listen to their complete message without interrupting
-5. When they finish, call save_voicemail with all the details they provided
-6. Thank them and confirm someone will call back
+                # Note: We can't synthesize speech without OpenAI, so we just log and disconnect gracefully
+                # The call will end, and the status callback will trigger follow-up
 
-Be conversational, empathetic, and efficient."""
-                        else:
-                            system_message = f"""You are {agent_name}, a helpful AI receptionist for {business_name}.
+            except Exception as e:
+                log(f"Error sending fallback message: {e}")
 
-Your job is to:
-- Greet callers warmly
-- Answer questions about the business
-- Help with appointments and inquiries
-- Provide excellent customer service
+        async def receive_from_twilio():
+            """Receive audio from Twilio and send to OpenAI"""
+            nonlocal stream_sid, latest_media_timestamp, call_sid, stream_start_time
+            loud_frames = 0  # Consecutive caller frames above LOCAL_BARGE_IN_RMS while we're speaking
+            try:
+                async for message in websocket.iter_text():
+                    data = orjson.loads(message)
 
-VOICEMAIL OPTION:
-If the caller wants to leave a message, speak to a human, or you cannot help them:
-1. Call the take_message function
-2. Say "beep!" and "Please leave your message after the beep."
-3. Listen to their complete message
-4. Call save_voicemail with their message details
-5. Thank them and confirm someone will call back
+                    if data['event'] == 'media':
+                        latest_media_timestamp = int(data['media']['timestamp'])
+                        if not openai_ws.open:
+                            # OpenAI side closed (send_to_twilio handles the fallback) - stop reading the call
+                            break
+                        # Handed to send_audio_to_openai so a slow OpenAI write never stalls reading Twilio
+                        openai_audio_queue.put_nowait(data['media']['payload'])
+
+                        # Local barge-in: stop our audio as soon as the caller is clearly talking
+                        # over it, without waiting for server_vad's speech_started round trip
+                        if LOCAL_BARGE_IN_RMS and mark_queue:
+                            pcm = audioop.ulaw2lin(base64.b64decode(data['media']['payload']), 2)
+                            if audioop.rms(pcm, 2) >= LOCAL_BARGE_IN_RMS:
+                                loud_frames += 1
+                                if loud_frames >= LOCAL_BARGE_IN_FRAMES:
+                                    loud_frames = 0
+                                    log("[VAD] Local barge-in detected")
+                                    await handle_speech_started_event(cancel_response=True)
+                            else:
+                                loud_frames = 0
 
-Be friendly, professional, and concise. Keep responses to 1-2 sentences."""
+                    elif data['event'] == 'start':
+                        stream_sid = data['start']['streamSid']
+                        call_sid = data['start']['customParameters'].get('CallSid') or data['start'].get('callSid')
+                        stream_start_time = time.time()  # Track when stream started
+                        log(f"Stream started: {stream_sid}, Call: {call_sid}")
+
+                        # Get session data
+                        session = SESSIONS.get(call_sid, {})
+                        business = session.get('business', {})
+                        agent_name = business.get('agent_name', AGENT_NAME)
+                        business_name = business.get('business_name', COMPANY_NAME)
+                        industry = business.get('industry', 'sales')
+
+                        # Configure OpenAI session based on business
+                        system_message = build_system_message(industry, agent_name, business_name)
 
-                        # Send session configuration
-                        # Configure VAD to be less sensitive to prevent false interruptions
-                        session_config = {
-                            "model": MODEL,  # REQUIRED: Specify the Realtime API model
-                            "turn_detection": {
-                                "type": "server_vad",
-                                "threshold": 0.5,  # Lower = more sensitive to silence (prevents cutting off mid-sentence) (default 0.5)
-                                "prefix_padding_ms": 300,  # Audio before speech (default 300ms)
-                                "silence_duration_ms": 1500  # Wait 1.5 seconds of silence before ending turn
-                            },
-                            "input_audio_format": "g711_ulaw",
-                            "instructions": system_message,
-                            "temperature": TEMPERATURE,
-                            "input_audio_transcription": {"model": "whisper-1"},  # Enable user speech transcription
-                        }
-
-                        # Configure modalities based on TTS provider
+                        # Send session configuration (pre-serialized, see _SESSION_UPDATE_TEMPLATE)
                         if USE_ELEVENLABS:
-                            # Text-only mode: OpenAI handles conversation, ElevenLabs handles TTS
-                            session_config["modalities"] = ["text"]
                             log("[ElevenLabs] Using text-only mode with ElevenLabs TTS")
                         else:
-                            # Full audio mode: OpenAI handles both conversation and TTS
-                            session_config["modalities"] = ["text", "audio"]
-                            session_config["output_audio_format"] = "g711_ulaw"
-                            session_config["voice"] = VOICE
                             log(f"[OpenAI] Using audio mode with OpenAI voice: {VOICE}")
-
-                        session_update = {
-                            "type": "session.update",
-                            "session": session_config
-                        }
-                        session_update["session"]["tools"] = [
-                            {
-                                "type": "function",
-                                "name": "get_available_slots",
-                                "description": "Get the first available appointment slot from the calendar. Returns the next available time starting 1 hour from now during business hours (9am-7pm daily). Call this when the user agrees to book their implementation appointment.",
-                                "parameters": {
-                                    "type": "object",
-                                    "properties": {
-                                        "days_ahead": {
-                                            "type": "number",
-                                            "description": "Number of days to search ahead for available slots (default 14)"
-                                        }
-                                    },
-                                    "required": []
-                                }
-                            },
-                            {
-                                "type": "function",
-                                "name": "get_next_business_day_slot",
-                                "description": "Get the first available slot for next business day (Monday-Friday) starting at 10am. If 10am is booked, tries 11am, 12pm, etc. Use this to offer 'tomorrow morning' option to customers.",
-                                "parameters": {
-                                    "type": "object",
-                                    "properties": {},
-                                    "required": []
-                                }
-                            },
-                            {
-                                "type": "function",
-                                "name": "book_appointment",
-                                "description": "Book an appointment slot. Call this after the user selects their preferred time slot.",
-                                "parameters": {
-                                    "type": "object",
-                                    "properties": {
-                                        "slot_datetime": {
-                                            "type": "string",
-                                            "description": "ISO 8601 datetime string for the appointment (e.g., '2025-11-18T10:00:00')"
-                                        },
-                                        "slot_display": {
-                                            "type": "string",
-                                            "description": "Human-readable description of the slot (e.g., 'Monday at 10am')"
-                                        }
-                                    },
-                                    "required": ["slot_datetime", "slot_display"]
-                                }
-                            },
-                            {
-                                "type": "function",
-                                "name": "send_trial_link",
-                                "description": "Send the Criton AI trial signup link via text message to the caller's phone. Call this when the caller shows interest, agrees to check it out, or says 'yes' when you offer to text them the link. Do NOT call this more than once per call.",
-                                "parameters": {
-                                    "type": "object",
-                                    "properties": {},
-                                    "required": []
-                                }
-                            },
-                            {
-                                "type": "function",
-                                "name": "take_message",
-                                "description": "Record a voicemail message from the caller. Call this when the caller wants to leave a message, or when you cannot help them with their request and they want someone to call them back. After calling this, say the beep sound 'beep!' and let them know they can leave their message.",
-                                "parameters": {
-                                    "type": "object",
-                                    "properties": {
-                                        "reason": {
-                                            "type": "string",
-                                            "description": "Brief reason for the voicemail (e.g., 'caller requested callback', 'after hours', 'complex inquiry')"
-                                        }
-                                    },
-                                    "required": ["reason"]
-                                }
-                            },
-                            {
-                                "type": "function",
-                                "name": "save_voicemail",
-                                "description": "Save the voicemail message content. Call this after the caller finishes leaving their message.",
-                                "parameters": {
-                                    "type": "object",
-                                    "properties": {
-                                        "message_content": {
-                                            "type": "string",
-                                            "description": "The transcribed content of the caller's voicemail message"
-                                        },
-                                        "callback_number": {
-                                            "type": "string",
-                                            "description": "Phone number to call back (if provided by caller)"
-                                        },
-                                        "caller_name": {
-                                            "type": "string",
-                                            "description": "Name of the caller (if provided)"
-                                        },
-                                        "urgency": {
-                                            "type": "string",
-                                            "description": "Urgency level: 'urgent', 'normal', or 'low'"
-                                        }
-                                    },
-                                    "required": ["message_content"]
-                                }
-                            }
-                        ]
-                        session_update["session"]["tool_choice"] = "auto"
-                        await openai_ws.send(json.dumps(session_update))
+                        await openai_ws.send(build_session_update(system_message))
 
                         # Trigger initial greeting (greeting text is in system instructions)
-                        await openai_ws.send(json.dumps({"type": "response.create"}))
+                        await openai_ws.send(_RESPONSE_CREATE_FRAME)
 
                     elif data['event'] == 'mark':
                         if mark_queue:
-                            mark_queue.pop(0)
+                            mark_queue.popleft()
 
                     elif data['event'] == 'stop':
                         log(f"[TWILIO] Received 'stop' event from Twilio. Stream: {stream_sid}")
-                        log(f"[TWILIO] Stop event details: {json.dumps(data, indent=2)}")
+                        log(f"[TWILIO] Stop event details: {orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()}")
                         log(f"[TWILIO] Call duration before stop: {time.time() - stream_start_time if stream_start_time else 'unknown'}s")
                         # Explicitly close OpenAI WebSocket to prevent resource leak
                         try:
@@ -2723,6 +3388,188 @@ Be friendly, professional, and concise. Keep responses to 1-2 sentences."""
                 log(f"Twilio WebSocket closed: {e.code if hasattr(e, 'code') else 'unknown'}")
             except Exception as e:
                 log(f"Error in receive_from_twilio: {e}")
+            finally:
+                # Let send_audio_to_openai finish once queued audio is out
+                openai_audio_queue.put_nowait(None)
+
+        async def send_audio_to_openai():
+            """Send caller audio to OpenAI, OPENAI_AUDIO_APPEND_FRAMES Twilio frames per input_audio_buffer.append"""
+            while True:
+                # Twilio streams a frame every 20ms for the whole call (silence included), so
+                # waiting for a full batch never stalls; the None sentinel flushes what's left
+                payloads = [await openai_audio_queue.get()]
+                while len(payloads) < OPENAI_AUDIO_APPEND_FRAMES and payloads[-1] is not None:
+                    payloads.append(await openai_audio_queue.get())
+                finished = payloads[-1] is None
+                if finished:
+                    payloads.pop()
+                if not payloads:
+                    return
+                audio_append = {
+                    "type": "input_audio_buffer.append",
+                    "audio": _join_base64_audio(payloads)
+                }
+                try:
+                    # OpenAI expects text frames, so decode the orjson bytes
+                    await openai_ws.send(orjson.dumps(audio_append).decode())
+                except websockets.exceptions.ConnectionClosed:
+                    # OpenAI side closed - send_to_twilio logs and handles it
+                    return
+                if finished:
+                    return
+
+        async def on_response_done(response):
+            """Speak response.done text through ElevenLabs when it handles TTS"""
+            if _DEBUG_LOGGING:
+                log(f"[DEBUG] response.done details: {orjson.dumps(response, option=orjson.OPT_INDENT_2).decode()}")
+
+            # Handle text responses for ElevenLabs TTS
+            if USE_ELEVENLABS:
+                try:
+                    # Extract text from response.done output
+                    output = response.get('response', {}).get('output', [])
+                    for item in output:
+                        if item.get('type') == 'message' and item.get('role') == 'assistant':
+                            content_parts = item.get('content', [])
+                            for content in content_parts:
+                                if content.get('type') == 'text':
+                                    text = content.get('text', '')
+                                    if text:
+                                        log(f"[ElevenLabs] Got text from response.done: {text}")
+
+                                        # Save transcript
+                                        if call_sid:
+                                            update_call_transcript(call_sid, "assistant", text)
+                                            log(f"Assistant: {text}")
+
+                                        # Generate audio with ElevenLabs
+                                        log("[ElevenLabs] Generating TTS...")
+                                        mulaw_audio = await elevenlabs_tts_async(text)
+
+                                        if mulaw_audio:
+                                            # Send audio to Twilio
+                                            audio_message = {
+                                                "event": "media",
+                                                "streamSid": stream_sid,
+                                                "media": {"payload": mulaw_audio}
+                                            }
+                                            await websocket.send_text(orjson.dumps(audio_message).decode())
+                                            log(f"[Audio] Sent μ-law audio to Twilio ({len(mulaw_audio)} chars base64)")
+
+                                            # Send mark event
+                                            await send_mark(websocket, stream_sid)
+                                        else:
+                                            log("[ERROR] Failed to generate ElevenLabs audio")
+                except Exception as e:
+                    log(f"[ERROR] Failed to extract/generate ElevenLabs audio from response.done: {e}")
+                    if SENTRY_AVAILABLE and SENTRY_DSN:
+                        sentry_sdk.capture_exception(e)
+
+        async def on_transcription_failed(response):
+            """Log failed caller transcriptions"""
+            if _DEBUG_LOGGING:
+                log(f"[DEBUG] Transcription failed: {orjson.dumps(response, option=orjson.OPT_INDENT_2).decode()}")
+
+        async def on_assistant_transcript_done(response):
+            """Save the assistant transcript (OpenAI audio mode)"""
+            # Log assistant response (OpenAI audio mode only)
+            if not USE_ELEVENLABS:
+                transcript = response.get('transcript', '')
+                if transcript and call_sid:
+                    update_call_transcript(call_sid, "assistant", transcript)
+                    log(f"Assistant: {transcript}")
+                    log(f"[AUDIO] Transcript complete. Audio chunks sent so far: {audio_chunks_sent}")
+
+                    # DO NOT add delay here - it interrupts audio playback
+                    # The audio chunks are still streaming when transcript completes
+
+                    # DO NOT extract from assistant responses to avoid capturing AI's mistakes
+                    # Only extract from user speech
+
+        async def on_user_transcript_completed(response):
+            """Save caller speech and extract customer info from it"""
+            # Log user speech
+            transcript = response.get('transcript', '')
+            if transcript and call_sid:
+                update_call_transcript(call_sid, "user", transcript)
+                log(f"User: {transcript}")
+
+                # Extract customer info from user speech ONLY
+                session = SESSIONS.get(call_sid)
+                if session:
+                    spawn_background_task(extract_customer_info_async(transcript, session))
+
+                # In text-only mode (ElevenLabs), manually trigger response after user speech
+                if USE_ELEVENLABS:
+                    log("[ElevenLabs] Triggering response after user speech")
+                    await openai_ws.send(_RESPONSE_CREATE_FRAME)
+
+        async def on_speech_started(response):
+            """Caller started talking - interrupt the assistant"""
+            log("Speech started - handling interruption")
+            await handle_speech_started_event()
+
+        async def on_function_call_done(response):
+            """Run a tool call from the AI and send the result back"""
+            # Function call from the AI - execute it and return the result
+            call_id = response.get('call_id')
+            function_name = response.get('name')
+            arguments_str = response.get('arguments', '{}')
+
+            log(f"[FUNCTION CALL] {function_name} with args: {arguments_str}")
+
+            try:
+                arguments = orjson.loads(arguments_str)
+            except orjson.JSONDecodeError:
+                arguments = {}
+
+            # Execute the function
+            tool = TOOLS.get(function_name)
+            function_result = await tool(arguments, SESSIONS.get(call_sid), call_sid) if tool else None
+
+            # Send function result back to OpenAI
+            if function_result is not None:
+                function_output = {
+                    "type": "conversation.item.create",
+                    "item": {
+                        "type": "function_call_output",
+                        "call_id": call_id,
+                        "output": orjson.dumps(function_result).decode()
+                    }
+                }
+                await openai_ws.send(orjson.dumps(function_output).decode())
+
+                # Trigger the AI to respond with the function result
+                await openai_ws.send(_RESPONSE_CREATE_FRAME)
+
+        async def on_openai_error(response):
+            """Handle OpenAI error events; returns True when the call should end"""
+            error_info = response.get('error') or {}
+            error_code = error_info.get('code') or ''
+            if error_code == 'response_cancel_not_active':
+                # Local barge-in after the response had finished generating - nothing to cancel
+                return
+            log(f"OpenAI error: {error_code or error_info.get('type', 'unknown')} - {error_info.get('message', '')}")
+
+            # Handle rate limiting - slow down briefly
+            if error_code == 'rate_limit_exceeded':
+                log("Rate limit hit - pausing briefly")
+                await asyncio.sleep(2)
+            # Session expired - end call gracefully
+            elif error_code == 'session_expired':
+                log("Session expired - ending call")
+                return True
+
+        # OpenAI event type -> handler; response.audio.delta stays inline in send_to_twilio
+        openai_event_handlers = {
+            'response.done': on_response_done,
+            'conversation.item.input_audio_transcription.failed': on_transcription_failed,
+            'response.audio_transcript.done': on_assistant_transcript_done,
+            'conversation.item.input_audio_transcription.completed': on_user_transcript_completed,
+            'input_audio_buffer.speech_started': on_speech_started,
+            'response.function_call_arguments.done': on_function_call_done,
+            'error': on_openai_error,
+        }
 
         async def send_to_twilio():
             """Receive audio from OpenAI and send to Twilio"""
@@ -2730,288 +3577,31 @@ Be friendly, professional, and concise. Keep responses to 1-2 sentences."""
             openai_connected = True
             try:
                 async for openai_message in openai_ws:
-                    response = json.loads(openai_message)
-                    log(f"[DEBUG] OpenAI response type: {response.get('type', 'unknown')}")
-
-                    # Log failures and issues for debugging
-                    if response['type'] == 'response.done':
-                        log(f"[DEBUG] response.done details: {json.dumps(response, indent=2)}")
-
-                        # Handle text responses for ElevenLabs TTS
-                        if USE_ELEVENLABS:
-                            try:
-                                # Extract text from response.done output
-                                output = response.get('response', {}).get('output', [])
-                                for item in output:
-                                    if item.get('type') == 'message' and item.get('role') == 'assistant':
-                                        content_parts = item.get('content', [])
-                                        for content in content_parts:
-                                            if content.get('type') == 'text':
-                                                text = content.get('text', '')
-                                                if text:
-                                                    log(f"[ElevenLabs] Got text from response.done: {text}")
-
-                                                    # Save transcript
-                                                    if call_sid:
-                                                        update_call_transcript(call_sid, "assistant", text)
-                                                        log(f"Assistant: {text}")
-
-                                                    # Generate audio with ElevenLabs
-                                                    log("[ElevenLabs] Generating TTS...")
-                                                    mulaw_audio = await elevenlabs_tts_async(text)
-
-                                                    if mulaw_audio:
-                                                        # Send audio to Twilio
-                                                        audio_message = {
-                                                            "event": "media",
-                                                            "streamSid": stream_sid,
-                                                            "media": {"payload": mulaw_audio}
-                                                        }
-                                                        await websocket.send_json(audio_message)
-                                                        log(f"[Audio] Sent μ-law audio to Twilio ({len(mulaw_audio)} chars base64)")
-
-                                                        # Send mark event
-                                                        await send_mark(websocket, stream_sid)
-                                                    else:
-                                                        log("[ERROR] Failed to generate ElevenLabs audio")
-                            except Exception as e:
-                                log(f"[ERROR] Failed to extract/generate ElevenLabs audio from response.done: {e}")
-                                if SENTRY_AVAILABLE and SENTRY_DSN:
-                                    sentry_sdk.capture_exception(e)
-                    elif response['type'] == 'conversation.item.input_audio_transcription.failed':
-                        log(f"[DEBUG] Transcription failed: {json.dumps(response, indent=2)}")
-
-                    if response['type'] == 'response.audio.delta' and 'delta' in response and not USE_ELEVENLABS:
-                        # Only process OpenAI audio when NOT using ElevenLabs
-                        audio_payload = base64.b64encode(base64.b64decode(response['delta'])).decode('utf-8')
-                        audio_delta = {
-                            "event": "media",
-                            "streamSid": stream_sid,
-                            "media": {"payload": audio_payload}
-                        }
-                        try:
-                            await websocket.send_json(audio_delta)
-                            # Log every 10th audio chunk to avoid spam
-                            if not hasattr(send_to_twilio, 'audio_chunk_count'):
-                                send_to_twilio.audio_chunk_count = 0
-                            send_to_twilio.audio_chunk_count += 1
-                            if send_to_twilio.audio_chunk_count % 10 == 0:
-                                log(f"[AUDIO] Sent {send_to_twilio.audio_chunk_count} audio chunks to Twilio")
-                        except WebSocketDisconnect as e:
-                            # Twilio disconnected - call ended by caller
-                            log(f"[AUDIO] Twilio WebSocket disconnected (caller hung up): {e}")
-                            log(f"[AUDIO] Total audio chunks sent before disconnect: {getattr(send_to_twilio, 'audio_chunk_count', 0)}")
-                            break
-                        except Exception as e:
-                            # Other error sending to Twilio
-                            log(f"[AUDIO] Error sending audio to Twilio: {type(e).__name__}: {e}")
-                            log(f"[AUDIO] Total audio chunks sent before error: {getattr(send_to_twilio, 'audio_chunk_count', 0)}")
-                            break
-
-                        if response.get("item_id") and response["item_id"] != last_assistant_item:
-                            response_start_timestamp_twilio = latest_media_timestamp
-                            last_assistant_item = response["item_id"]
-
-                        try:
-                            await send_mark(websocket, stream_sid)
-                        except (WebSocketDisconnect, Exception):
-                            # Twilio closed, ignore
-                            pass
-
-                    elif response['type'] == 'response.audio_transcript.done':
-                        # Log assistant response (OpenAI audio mode only)
-                        if not USE_ELEVENLABS:
-                            transcript = response.get('transcript', '')
-                            if transcript and call_sid:
-                                update_call_transcript(call_sid, "assistant", transcript)
-                                log(f"Assistant: {transcript}")
-                                log(f"[AUDIO] Transcript complete. Audio chunks sent so far: {getattr(send_to_twilio, 'audio_chunk_count', 0)}")
-
-                                # DO NOT add delay here - it interrupts audio playback
-                                # The audio chunks are still streaming when transcript completes
-
-                                # DO NOT extract from assistant responses to avoid capturing AI's mistakes
-                                # Only extract from user speech
-
-                    elif response['type'] == 'conversation.item.input_audio_transcription.completed':
-                        # Log user speech
-                        transcript = response.get('transcript', '')
-                        if transcript and call_sid:
-                            update_call_transcript(call_sid, "user", transcript)
-                            log(f"User: {transcript}")
-
-                            # Extract customer info from user speech ONLY
-                            session = SESSIONS.get(call_sid)
-                            if session:
-                                extract_customer_info(transcript, session, is_user_speech=True)
-
-                            # In text-only mode (ElevenLabs), manually trigger response after user speech
-                            if USE_ELEVENLABS:
-                                log("[ElevenLabs] Triggering response after user speech")
-                                await openai_ws.send(json.dumps({"type": "response.create"}))
-
-                    elif response['type'] == 'input_audio_buffer.speech_started':
-                        log("Speech started - handling interruption")
-                        await handle_speech_started_event()
-
-                    elif response['type'] == 'response.function_call_arguments.done':
-                        # Function call from the AI - execute it and return the result
-                        call_id = response.get('call_id')
-                        function_name = response.get('name')
-                        arguments_str = response.get('arguments', '{}')
-
-                        log(f"[FUNCTION CALL] {function_name} with args: {arguments_str}")
-
-                        try:
-                            arguments = json.loads(arguments_str)
-                        except json.JSONDecodeError:
-                            arguments = {}
-
-                        # Execute the function
-                        function_result = None
-                        session = SESSIONS.get(call_sid)
-
-                        if function_name == "get_available_slots":
-                            days_ahead = arguments.get('days_ahead', 14)
-                            slots = get_available_calendar_slots(days_ahead=days_ahead, num_slots=1)
-                            if slots:
-                                function_result = {
-                                    "first_available": slots[0],
-                                    "message": f"First available appointment is {slots[0]['display']}"
-                                }
-                                log(f"[FUNCTION RESULT] First available slot: {slots[0]['display']}")
-                            else:
-                                function_result = {
-                                    "first_available": None,
-                                    "message": "No available appointments found in the next 14 days"
-                                }
-                                log(f"[FUNCTION RESULT] No available slots found")
-
-                        elif function_name == "get_next_business_day_slot":
-                            next_day_slot = get_next_business_day_slot()
-                            if next_day_slot:
-                                function_result = {
-                                    "next_business_day_slot": next_day_slot,
-                                    "message": f"Next business day slot: {next_day_slot['display']}"
-                                }
-                                log(f"[FUNCTION RESULT] Next business day slot: {next_day_slot['display']}")
-                            else:
-                                function_result = {
-                                    "next_business_day_slot": None,
-                                    "message": "No available slots on next business day"
-                                }
-                                log(f"[FUNCTION RESULT] No next business day slots found")
-
-                        elif function_name == "book_appointment":
-                            slot_datetime = arguments.get('slot_datetime')
-                            slot_display = arguments.get('slot_display')
-
-                            if slot_datetime and slot_display and session:
-                                # Store appointment info in session
-                                session['appointment_datetime'] = slot_datetime
-                                session['appointment_display'] = slot_display
-                                log(f"[APPOINTMENT] Stored in session: {slot_display} ({slot_datetime})")
-
-                                function_result = {
-                                    "success": True,
-                                    "message": f"Appointment booked for {slot_display}"
-                                }
-                            else:
-                                function_result = {
-                                    "success": False,
-                                    "message": "Missing required information for booking"
-                                }
-
-                        elif function_name == "send_trial_link":
-                            caller_phone = session.get('caller_phone', '') if session else ''
-                            if caller_phone:
-                                sms_sent = send_trial_link_sms(caller_phone)
-                                function_result = {
-                                    "success": sms_sent,
-                                    "message": "Trial link texted to the caller's phone. Let them know to check their texts." if sms_sent else "Failed to send text. Apologize and offer to email the link instead."
-                                }
-                                log(f"[TRIAL LINK] SMS {'sent' if sms_sent else 'FAILED'} to {caller_phone}")
-                            else:
-                                function_result = {
-                                    "success": False,
-                                    "message": "No phone number available. Ask the caller for their phone number to text the link."
-                                }
-
-                        elif function_name == "take_message":
-                            reason = arguments.get('reason', 'caller requested')
-                            log(f"[VOICEMAIL] Starting voicemail mode - reason: {reason}")
-
-                            if session:
-                                session['voicemail_mode'] = True
-                                session['voicemail_reason'] = reason
-
-                            function_result = {
-                                "success": True,
-                                "message": "Voicemail mode activated. Say 'beep!' and prompt the caller to leave their message after the beep. Listen to their entire message, then call save_voicemail with the transcribed content."
-                            }
+                    # Skip high-frequency events we never act on without parsing them
+                    if _sniff_event_type(openai_message) in _IGNORED_OPENAI_EVENTS:
+                        continue
 
-                        elif function_name == "save_voicemail":
-                            message_content = arguments.get('message_content', '')
-                            callback_number = arguments.get('callback_number')
-                            caller_name = arguments.get('caller_name')
-                            urgency = arguments.get('urgency', 'normal')
-
-                            log(f"[VOICEMAIL] Saving voicemail - caller: {caller_name}, urgency: {urgency}")
-                            log(f"[VOICEMAIL] Message: {message_content[:100]}...")
-
-                            if session:
-                                session['voicemail_message'] = message_content
-                                session['voicemail_callback'] = callback_number
-                                session['voicemail_urgency'] = urgency
-                                if caller_name:
-                                    session['customer_name'] = caller_name
-
-                                # Save voicemail to database
-                                if call_sid and SUPABASE:
-                                    try:
-                                        # Store as a transcript entry with type 'voicemail'
-                                        SUPABASE.table('call_transcripts').insert({
-                                            "call_sid": call_sid,
-                                            "role": "voicemail",
-                                            "content": f"[{urgency.upper()}] {caller_name or 'Unknown'} ({callback_number or session.get('caller_phone', 'No callback number')}): {message_content}"
-                                        }).execute()
-                                        log(f"[VOICEMAIL] Saved to database for call {call_sid}")
-                                    except Exception as e:
-                                        log(f"[VOICEMAIL] Error saving to database: {e}")
-
-                            function_result = {
-                                "success": True,
-                                "message": f"Voicemail saved successfully. Thank the caller and let them know someone will get back to them soon."
-                            }
+                    response = orjson.loads(openai_message)
+                    event_type = response['type']
+                    # Debug dumps are built only when they will be logged
+                    if _DEBUG_LOGGING:
+                        log(f"[DEBUG] OpenAI response type: {event_type}")
+
+                    if event_type == 'response.audio.delta':
+                        if 'delta' in response and not USE_ELEVENLABS:
+                            # Only process OpenAI audio when NOT using ElevenLabs
+                            # Handed to send_audio_to_twilio, which merges deltas that queue up
+                            twilio_audio_queue.put_nowait(response['delta'])
+
+                            if response.get("item_id") and response["item_id"] != last_assistant_item:
+                                response_start_timestamp_twilio = latest_media_timestamp
+                                last_assistant_item = response["item_id"]
+                        continue
 
-                        # Send function result back to OpenAI
-                        if function_result is not None:
-                            function_output = {
-                                "type": "conversation.item.create",
-                                "item": {
-                                    "type": "function_call_output",
-                                    "call_id": call_id,
-                                    "output": json.dumps(function_result)
-                                }
-                            }
-                            await openai_ws.send(json.dumps(function_output))
-
-                            # Trigger the AI to respond with the function result
-                            await openai_ws.send(json.dumps({"type": "response.create"}))
-
-                    elif response['type'] == 'error':
-                        error_info = response.get('error', {})
-                        error_code = error_info.get('code', '')
-                        log(f"OpenAI error: {error_info}")
-
-                        # Handle rate limiting - slow down briefly
-                        if error_code == 'rate_limit_exceeded':
-                            log("Rate limit hit - pausing briefly")
-                            await asyncio.sleep(2)
-                        # Session expired - end call gracefully
-                        elif error_code == 'session_expired':
-                            log("Session expired - ending call")
-                            break
+                    # Handlers return True when the call should end
+                    handler = openai_event_handlers.get(event_type)
+                    if handler and await handler(response):
+                        break
 
                 # If we exit the loop naturally (not via exception), log it
                 log("OpenAI message stream ended (connection closed cleanly)")
@@ -3025,14 +3615,84 @@ Be friendly, professional, and concise. Keep responses to 1-2 sentences."""
                 await send_error_message_to_caller(websocket, stream_sid)
             except Exception as e:
                 log(f"ERROR in send_to_twilio: {type(e).__name__}: {e}")
-                import traceback
-                log(f"Traceback: {traceback.format_exc()}")
+                if LOG_TRACEBACKS:
+                    log(f"Traceback: {traceback.format_exc()}")
                 openai_connected = False
                 # Send graceful fallback message to caller
                 await send_error_message_to_caller(websocket, stream_sid)
+            finally:
+                # Let send_audio_to_twilio finish once queued audio is out
+                twilio_audio_queue.put_nowait(None)
+
+        async def send_audio_to_twilio():
+            """Send OpenAI audio to Twilio, merging deltas that queued up while the previous send was in flight"""
+            nonlocal audio_chunks_sent
+            while True:
+                payloads = [await twilio_audio_queue.get()]
+                while len(payloads) < TWILIO_AUDIO_MAX_BATCH and not twilio_audio_queue.empty() and payloads[-1] is not None:
+                    payloads.append(twilio_audio_queue.get_nowait())
+                finished = payloads[-1] is None
+                if finished:
+                    payloads.pop()
+                if not payloads:
+                    return
+
+                # The g711_ulaw deltas are already base64, exactly what Twilio expects
+                audio_delta = {
+                    "event": "media",
+                    "streamSid": stream_sid,
+                    "media": {"payload": _join_base64_audio(payloads)}
+                }
+                try:
+                    await websocket.send_text(orjson.dumps(audio_delta).decode())
+                    # Log every 64th audio chunk to avoid spam
+                    audio_chunks_sent += 1
+                    if audio_chunks_sent & 0x3F == 0:
+                        log(f"[AUDIO] Sent {audio_chunks_sent} audio chunks to Twilio")
+                except WebSocketDisconnect as e:
+                    # Twilio disconnected - call ended by caller
+                    log(f"[AUDIO] Twilio WebSocket disconnected (caller hung up): {e}")
+                    log(f"[AUDIO] Total audio chunks sent before disconnect: {audio_chunks_sent}")
+                    return
+                except Exception as e:
+                    # Other error sending to Twilio
+                    log(f"[AUDIO] Error sending audio to Twilio: {type(e).__name__}: {e}")
+                    log(f"[AUDIO] Total audio chunks sent before error: {audio_chunks_sent}")
+                    return
+
+                # One mark after the last queued audio is enough to know when playback ends; more
+                # audio already waiting will be followed by its own mark
+                if twilio_audio_queue.empty():
+                    try:
+                        await send_mark(websocket, stream_sid)
+                    except (WebSocketDisconnect, Exception):
+                        # Twilio closed, ignore
+                        pass
+
+                if finished:
+                    return
 
-        async def handle_speech_started_event():
-            """Handle user interruption"""
+        def drop_queued_audio():
+            """Discard audio not yet sent to Twilio (keeps the end-of-stream marker)"""
+            finished = False
+            while not twilio_audio_queue.empty():
+                if twilio_audio_queue.get_nowait() is None:
+                    finished = True
+            if finished:
+                twilio_audio_queue.put_nowait(None)
+
+        async def extract_customer_info_async(transcript, session):
+            """Run extract_customer_info in the thread pool so regex work doesn't stall audio forwarding"""
+            async with extraction_lock:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, extract_customer_info, transcript, session, True)
+
+        async def handle_speech_started_event(cancel_response=False):
+            """Handle user interruption
+
+            server_vad cancels its own response on speech_started; the local barge-in detector
+            passes cancel_response=True so the rest of the reply isn't streamed and replayed.
+            """
             nonlocal response_start_timestamp_twilio, last_assistant_item, stream_start_time
 
             # Guard: Ignore interruptions in first 3 seconds to prevent false triggers during greeting
@@ -3045,19 +3705,13 @@ Be friendly, professional, and concise. Keep responses to 1-2 sentences."""
             if mark_queue and response_start_timestamp_twilio is not None:
                 elapsed_time = latest_media_timestamp - response_start_timestamp_twilio
 
+                if cancel_response:
+                    await openai_ws.send(_RESPONSE_CANCEL_FRAME)
                 if last_assistant_item:
-                    truncate_event = {
-                        "type": "conversation.item.truncate",
-                        "item_id": last_assistant_item,
-                        "content_index": 0,
-                        "audio_end_ms": elapsed_time
-                    }
-                    await openai_ws.send(json.dumps(truncate_event))
+                    await openai_ws.send(_TRUNCATE_FRAME_TEMPLATE % (last_assistant_item, elapsed_time))
 
-                await websocket.send_json({
-                    "event": "clear",
-                    "streamSid": stream_sid
-                })
+                drop_queued_audio()
+                await websocket.send_text(_CLEAR_FRAME_TEMPLATE % stream_sid)
 
                 mark_queue.clear()
                 last_assistant_item = None
@@ -3066,25 +3720,20 @@ Be friendly, professional, and concise. Keep responses to 1-2 sentences."""
         async def send_mark(connection, stream_sid):
             """Send mark event to track audio playback"""
             if stream_sid:
-                mark_event = {
-                    "event": "mark",
-                    "streamSid": stream_sid,
-                    "mark": {"name": "responsePart"}
-                }
-                await connection.send_json(mark_event)
+                await connection.send_text(_MARK_FRAME_TEMPLATE % stream_sid)
                 mark_queue.append('responsePart')
 
 
         # Run both tasks concurrently
         log(f"[DEBUG] Starting concurrent tasks for call {call_sid}")
         try:
-            await asyncio.gather(receive_from_twilio(), send_to_twilio())
+            await asyncio.gather(receive_from_twilio(), send_audio_to_openai(), send_to_twilio(), send_audio_to_twilio())
             log(f"[DEBUG] Both tasks completed normally for call {call_sid}")
         except Exception as e:
             log(f"CRITICAL ERROR in media stream handler: {type(e).__name__}: {e}")
             log(f"Call SID: {call_sid}, Stream SID: {stream_sid}")
-            import traceback
-            log(f"Traceback: {traceback.format_exc()}")
+            if LOG_TRACEBACKS:
+                log(f"Traceback: {traceback.format_exc()}")
 
             # Mark call as failed in session for follow-up
             if call_sid and call_sid in SESSIONS:
@@ -3094,8 +3743,88 @@ Be friendly, professional, and concise. Keep responses to 1-2 sentences."""
         log(f"[DEBUG] Entering finally block - closing OpenAI WebSocket for call {call_sid}")
         # Always close the OpenAI WebSocket
         await openai_ws.close()
+        # Write out the rest of the transcript
+        if call_sid:
+            await db_call(flush_call_transcripts, call_sid)
         log(f"[DEBUG] OpenAI WebSocket closed, handler complete for call {call_sid}")
 
+def spawn_background_task(coro):
+    """Run coroutine without awaiting it, tracked in _BACKGROUND_TASKS for graceful shutdown"""
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+    return task
+
+async def finish_completed_call(call_sid, caller_phone, customer_name, customer_email, customer_phone,
+                                business_type, company_name, appointment_datetime, appointment_display,
+                                call_start_time):
+    """Book the chosen slot, then send the customer follow-up and owner summary concurrently"""
+    loop = asyncio.get_event_loop()
+
+    # Book calendar appointment if slot was chosen
+    calendar_link = None
+    if appointment_datetime and customer_name and business_type:
+        log(f"Booking calendar appointment for {appointment_display}")
+        booking_result = await loop.run_in_executor(None, partial(
+            book_calendar_appointment,
+            appointment_datetime,
+            customer_name,
+            customer_email,
+            customer_phone or caller_phone,
+            business_type
+        ))
+        if booking_result and booking_result.get('success'):
+            log(f"✓ Calendar appointment booked successfully")
+            calendar_link = booking_result['link']
+        else:
+            log(f"✗ Failed to book calendar appointment")
+
+    email_sends = []
+
+    # Always send confirmation email if we have customer email
+    if customer_email and appointment_datetime:
+        log(f"Sending calendar confirmation email to {customer_email}")
+        email_sends.append(partial(send_demo_follow_up, customer_name, customer_email, business_type, appointment_datetime))
+    elif customer_email and not appointment_datetime:
+        log(f"Sending follow-up email (no appointment booked) to {customer_email}")
+        email_sends.append(partial(send_demo_follow_up, customer_name, customer_email, business_type))
+    else:
+        log(f"No email to send - customer_email: {customer_email}, appointment: {appointment_datetime}")
+
+    # The summary reads the transcript back from the database, so write out what's queued first
+    await db_call(flush_call_transcripts, call_sid)
+
+    # Always send post-call summary to business owner
+    log(f"Sending post-call summary to business owner")
+    email_sends.append(partial(
+        send_post_call_summary,
+        call_sid=call_sid,
+        caller_phone=caller_phone,
+        customer_name=customer_name,
+        customer_email=customer_email,
+        customer_phone=customer_phone,
+        business_type=business_type,
+        company_name=company_name,
+        appointment_display=appointment_display,
+        call_start_time=call_start_time,
+    ))
+
+    # Each send retries with backoff on its own, so run them side by side
+    results = await asyncio.gather(
+        *(loop.run_in_executor(None, send) for send in email_sends),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            log(f"[ERROR] End-of-call email failed for {call_sid}: {result}")
+
+@app.on_event("shutdown")
+async def drain_background_tasks():
+    """Let in-flight end-of-call work finish before the process exits"""
+    if _BACKGROUND_TASKS:
+        log(f"Waiting for {len(_BACKGROUND_TASKS)} background task(s) to finish...")
+        await asyncio.gather(*_BACKGROUND_TASKS, return_exceptions=True)
+
 @app.post("/status")
 async def status_callback(request: Request):
     """Handle call status updates"""
@@ -3128,38 +3857,9 @@ async def status_callback(request: Request):
             log(f"Customer phone: {caller_phone}")
             # TODO: Send alert email to business owner about failed call
         else:
-            # Normal successful call flow
-
-            # Book calendar appointment if slot was chosen
-            calendar_link = None
-            if appointment_datetime and customer_name and business_type:
-                log(f"Booking calendar appointment for {appointment_display}")
-                booking_result = book_calendar_appointment(
-                    appointment_datetime,
-                    customer_name,
-                    customer_email,
-                    customer_phone or caller_phone,
-                    business_type
-                )
-                if booking_result['success']:
-                    log(f"✓ Calendar appointment booked successfully")
-                    calendar_link = booking_result['link']
-                else:
-                    log(f"✗ Failed to book calendar appointment")
-
-            # Always send confirmation email if we have customer email
-            if customer_email and appointment_datetime:
-                log(f"Sending calendar confirmation email to {customer_email}")
-                send_demo_follow_up(customer_name, customer_email, business_type, appointment_datetime)
-            elif customer_email and not appointment_datetime:
-                log(f"Sending follow-up email (no appointment booked) to {customer_email}")
-                send_demo_follow_up(customer_name, customer_email, business_type)
-            else:
-                log(f"No email to send - customer_email: {customer_email}, appointment: {appointment_datetime}")
-
-            # Always send post-call summary to business owner
-            log(f"Sending post-call summary to business owner")
-            send_post_call_summary(
+            # Normal successful call flow - booking and emails run in the background
+            # so Twilio gets its response right away
+            spawn_background_task(finish_completed_call(
                 call_sid=call_sid,
                 caller_phone=caller_phone,
                 customer_name=customer_name,
@@ -3167,13 +3867,13 @@ async def status_callback(request: Request):
                 customer_phone=customer_phone,
                 business_type=business_type,
                 company_name=company_name,
+                appointment_datetime=appointment_datetime,
                 appointment_display=appointment_display,
                 call_start_time=session.get('call_start_time'),
-            )
+            ))
 
     # Clean up session
-    if call_sid in SESSIONS:
-        del SESSIONS[call_sid]
+    SESSIONS.pop(call_sid, None)
 
     return JSONResponse(content={"status": "ok"})
 
@@ -3199,11 +3899,11 @@ async def recording_status_callback(request: Request):
         if SUPABASE:
             try:
                 # Find call by call_sid and update with recording info
-                result = SUPABASE.table('calls').update({
+                result = await db_call(SUPABASE.table('calls').update({
                     'recording_url': recording_url_mp3,
                     'recording_sid': recording_sid,
                     'recording_duration': int(recording_duration) if recording_duration else None
-                }).eq('call_sid', call_sid).execute()
+                }).eq('call_sid', call_sid).execute)
 
                 if result.data:
                     log(f"Updated call {call_sid} with recording URL")
@@ -3231,11 +3931,11 @@ async def test_daily_digest():
     try:
         today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         today_end = datetime.now().replace(hour=23, minute=59, second=59, microsecond=999999)
-        result = supabase.table('calls').select('*').gte('created_at', today_start.isoformat()).lte('created_at', today_end.isoformat()).execute()
+        result = await db_call(supabase.table('calls').select('*').gte('created_at', today_start.isoformat()).lte('created_at', today_end.isoformat()).execute)
         call_count = len(result.data) if result.data else 0
 
         # Send digest
-        digest_result = send_daily_digest()
+        digest_result = await db_call(send_daily_digest)
 
         return JSONResponse(content={
             "status": "success" if digest_result else "failed",
@@ -3244,7 +3944,6 @@ async def test_daily_digest():
         })
     except Exception as e:
         log(f"Error in test-digest: {e}")
-        import traceback
         log(f"Traceback: {traceback.format_exc()}")
         return JSONResponse(content={
             "status": "error",
@@ -3273,7 +3972,6 @@ async def get_dashboard_stats(business_id: str):
         return JSONResponse(content={"error": "Database not configured"}, status_code=500)
 
     try:
-        from datetime import datetime, timedelta
 
         now = datetime.now()
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -3281,7 +3979,7 @@ async def get_dashboard_stats(business_id: str):
         month_start = today_start.replace(day=1)
 
         # Get all calls for this business
-        result = supabase.table('calls').select('*').eq('business_id', business_id).execute()
+        result = await db_call(supabase.table('calls').select('*').eq('business_id', business_id).execute)
         all_calls = result.data or []
 
         # Filter by time periods
@@ -3293,7 +3991,7 @@ async def get_dashboard_stats(business_id: str):
         def calc_stats(calls):
             total = len(calls)
             completed = len([c for c in calls if c.get('status') == 'completed'])
-            failed = len([c for c in calls if c.get('status') in ['failed', 'busy', 'no-answer']])
+            failed = len([c for c in calls if c.get('status') in FAILED_CALL_STATUSES])
             total_duration = sum(int(c.get('duration', 0)) for c in calls if c.get('duration'))
             avg_duration = total_duration / completed if completed > 0 else 0
             return {
@@ -3327,10 +4025,10 @@ async def get_dashboard_calls(business_id: str, limit: int = 50, offset: int = 0
 
     try:
         # Get calls with pagination, newest first
-        result = supabase.table('calls').select('*').eq('business_id', business_id).order('created_at', desc=True).range(offset, offset + limit - 1).execute()
+        result = await db_call(supabase.table('calls').select('*').eq('business_id', business_id).order('created_at', desc=True).range(offset, offset + limit - 1).execute)
 
         # Get total count
-        count_result = supabase.table('calls').select('id', count='exact').eq('business_id', business_id).execute()
+        count_result = await db_call(supabase.table('calls').select('id', count='exact').eq('business_id', business_id).execute)
         total_count = count_result.count if hasattr(count_result, 'count') else len(count_result.data or [])
 
         return JSONResponse(content={
@@ -3354,14 +4052,14 @@ async def get_call_detail(call_id: str):
 
     try:
         # Get call record
-        call_result = supabase.table('calls').select('*').eq('id', call_id).execute()
+        call_result = await db_call(supabase.table('calls').select('*').eq('id', call_id).execute)
         if not call_result.data:
             return JSONResponse(content={"error": "Call not found"}, status_code=404)
 
         call = call_result.data[0]
 
         # Get transcript for this call (call_transcripts uses Twilio call_sid, not UUID)
-        transcript_result = supabase.table('call_transcripts').select('*').eq('call_sid', call.get('call_sid', '')).order('created_at', desc=False).execute()
+        transcript_result = await db_call(supabase.table('call_transcripts').select('*').eq('call_sid', call.get('call_sid', '')).order('created_at', desc=False).execute)
 
         return JSONResponse(content={
             "success": True,
@@ -3382,17 +4080,17 @@ async def get_business_settings(business_id: str):
 
     try:
         # Get business info
-        result = supabase.table('businesses').select('*').eq('id', business_id).execute()
+        result = await db_call(supabase.table('businesses').select('*').eq('id', business_id).execute)
         if not result.data:
             return JSONResponse(content={"error": "Business not found"}, status_code=404)
 
         business = result.data[0]
 
         # Get phone numbers for this business
-        phones_result = supabase.table('phone_numbers').select('*').eq('business_id', business_id).execute()
+        phones_result = await db_call(supabase.table('phone_numbers').select('*').eq('business_id', business_id).execute)
 
         # Remove sensitive fields
-        safe_business = {k: v for k, v in business.items() if k not in ['dashboard_password_hash']}
+        safe_business = {k: v for k, v in business.items() if k != 'dashboard_password_hash'}
 
         return JSONResponse(content={
             "success": True,
@@ -3412,7 +4110,7 @@ async def list_businesses():
         return JSONResponse(content={"error": "Database not configured"}, status_code=500)
 
     try:
-        result = supabase.table('businesses').select('id, business_name, owner_name, owner_email, industry, status, created_at').execute()
+        result = await db_call(supabase.table('businesses').select('id, business_name, owner_name, owner_email, industry, status, created_at').execute)
 
         return JSONResponse(content={
             "success": True,
@@ -3432,7 +4130,7 @@ async def api_available_slots(request: Request):
         body = await request.json()
         days_ahead = body.get("days_ahead", 14)
 
-        slots = get_available_calendar_slots(days_ahead=days_ahead, num_slots=3)
+        slots = await asyncio.get_event_loop().run_in_executor(None, partial(get_available_calendar_slots, days_ahead=days_ahead, num_slots=3))
 
         if slots:
             slot_list = ", ".join([s['display'] for s in slots[:3]])
@@ -3461,11 +4159,10 @@ async def api_check_slot(request: Request):
             return JSONResponse(content={"success": False, "message": "requested_datetime is required"})
 
         # Parse the requested datetime
-        from dateutil import parser
         requested_dt = parser.parse(requested_datetime)
 
         # Check if slot is available using existing function
-        slots = get_available_calendar_slots(days_ahead=14, num_slots=10)
+        slots = await asyncio.get_event_loop().run_in_executor(None, partial(get_available_calendar_slots, days_ahead=14, num_slots=10))
 
         # Check if requested time matches any available slot (within 30 min window)
         for slot in slots:
@@ -3537,17 +4234,17 @@ async def api_book_appointment(request: Request):
             return JSONResponse(content={"success": False, "message": "slot_datetime is required"})
 
         # Parse datetime
-        from dateutil import parser
         slot_dt = parser.parse(slot_datetime)
 
         # Try to book in Google Calendar using existing function
-        result = book_calendar_appointment(
+        result = await asyncio.get_event_loop().run_in_executor(None, partial(
+            book_calendar_appointment,
             slot_datetime=slot_datetime,
             customer_name=customer_name,
             customer_email=customer_email or "",
             customer_phone=customer_phone or "",
             business_type=company_name
-        )
+        ))
 
         if result and result.get('success'):
             return JSONResponse(content={
@@ -3607,7 +4304,7 @@ async def api_send_trial_link(request: Request):
                 "message": "No active caller phone found. Ask the caller for their phone number."
             })
 
-        sms_sent = send_trial_link_sms(caller_phone)
+        sms_sent = await asyncio.get_event_loop().run_in_executor(None, send_trial_link_sms, caller_phone)
         if sms_sent:
             return JSONResponse(content={
                 "success": True,
@@ -3656,6 +4353,17 @@ scheduler.add_job(
     replace_existing=True
 )
 
+# Keep every number's business cached (refreshed before BUSINESS_CACHE_TTL runs out); first run is now
+scheduler.add_job(
+    preload_business_cache,
+    trigger='interval',
+    seconds=max(BUSINESS_CACHE_TTL // 2, 1),
+    next_run_time=datetime.now(),
+    id='business_cache',
+    name='Refresh phone number -> business cache',
+    replace_existing=True
+)
+
 scheduler.start()
 log("Scheduler started - Daily digest will be sent at 11:59 PM")
 
@@ -3665,5 +4373,6 @@ if __name__ == "__main__":
     log(f"Starting Bolt AI Platform (Realtime API) on port {PORT}")
     log(f"Public base: {PUBLIC_BASE}")
     log(f"Voice: {VOICE}")
-    # Use asyncio instead of uvloop for websockets compatibility
-    uvicorn.run(app, host="0.0.0.0", port=PORT, loop="asyncio")
+    log(f"Event loop: {UVICORN_LOOP}")
+    # Single worker - call sessions and live sockets are per-process (see SESSIONS)
+    uvicorn.run(app, host="0.0.0.0", port=PORT, loop=UVICORN_LOOP)
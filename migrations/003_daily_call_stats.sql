@@ -0,0 +1,30 @@
+-- Migration: Aggregate the daily digest numbers in Postgres
+-- Run this in Supabase SQL editor: https://supabase.com/dashboard/project/owffvdmmvcnbnjaprqis/sql
+
+-- One row of counts for calls created in [day_start, day_end]; called by send_daily_digest via supabase.rpc()
+-- (until this exists the digest falls back to fetching the day's calls and counting in Python)
+CREATE OR REPLACE FUNCTION daily_call_stats(day_start TIMESTAMP, day_end TIMESTAMP)
+RETURNS TABLE (
+    total BIGINT,
+    completed BIGINT,
+    failed BIGINT,
+    in_progress BIGINT,
+    total_duration BIGINT -- seconds, completed calls only
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        count(*),
+        count(*) FILTER (WHERE status = 'completed'),
+        count(*) FILTER (WHERE status IN ('failed', 'busy', 'no-answer')),
+        count(*) FILTER (WHERE status = 'in-progress'),
+        coalesce(sum(duration) FILTER (WHERE status = 'completed'), 0)
+    FROM calls
+    WHERE created_at >= day_start AND created_at <= day_end;
+$$;
+
+-- Index for the day-range scan above and the digest's "recent calls" query
+CREATE INDEX IF NOT EXISTS idx_calls_created_at ON calls(created_at);
+
+-- Verify
+SELECT * FROM daily_call_stats(date_trunc('day', now())::timestamp, now()::timestamp);